@@ -0,0 +1,54 @@
+"""
+PLY grammar against the fast path Lua table reader and the streaming keyDiffs scan on large diff files
+
+Run from the repository root: python benchmarks/bench_dcs_lua_reader.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import adaptors.dcs_world as dcs  # noqa: E402
+from adaptors.dcs_world_lua import iter_key_bindings, parse_lua_table  # noqa: E402
+
+
+def generate_diff(bindings: int, axes: int) -> str:
+    """ A diff.lua body with the given number of keyDiffs entries and axisDiffs entries """
+    entries = []
+    for i in range(bindings):
+        entries.append(
+            f'\t\t["d{3000 + i}pnilu{3000 + i}cd{i % 40}vd1vpnilvunil"] = {{\n'
+            f'\t\t\t["added"] = {{\n\t\t\t\t[1] = {{\n\t\t\t\t\t["key"] = "JOY_BTN{i % 128 + 1}",\n\t\t\t\t}},\n'
+            f'\t\t\t}},\n\t\t\t["name"] = "Command number {i}",\n\t\t}},\n')
+    axis_entries = []
+    for i in range(axes):
+        axis_entries.append(
+            f'\t\t["a{2000 + i}cdnil"] = {{\n\t\t\t["changed"] = {{\n\t\t\t\t[1] = {{\n'
+            '\t\t\t\t\t["filter"] = {\n\t\t\t\t\t\t["curvature"] = {\n\t\t\t\t\t\t\t[1] = 0.13,\n\t\t\t\t\t\t},\n'
+            '\t\t\t\t\t\t["deadzone"] = 0,\n\t\t\t\t\t\t["invert"] = false,\n\t\t\t\t\t},\n'
+            f'\t\t\t\t\t["key"] = "JOY_Y",\n\t\t\t\t}},\n\t\t\t}},\n\t\t\t["name"] = "Axis {i}",\n\t\t}},\n')
+    return ("{\n" + '\t["axisDiffs"] = {\n' + ''.join(axis_entries) + "\t},\n"
+            + '\t["keyDiffs"] = {\n' + ''.join(entries) + "\t},\n}\n")
+
+
+def parse_ply(text: str) -> dict:
+    lexer, parser = dcs.get_lua_parser()
+    return parser.parse(text, lexer=lexer)
+
+
+def stream(text: str) -> list:
+    return list(iter_key_bindings(text))
+
+
+def main() -> None:
+    for bindings in (100, 500, 2000):
+        text = generate_diff(bindings, axes=bindings)
+        assert parse_ply(text) == parse_lua_table(text)
+        for name, parse in [('ply', parse_ply), ('fast', parse_lua_table), ('stream', stream)]:
+            seconds = min(timeit.repeat(lambda: parse(text), number=5, repeat=3)) / 5
+            print(f"{bindings:>5} key/axis {len(text) // 1024:>5} KiB  {name:<6} {seconds * 1000:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
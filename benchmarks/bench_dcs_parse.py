@@ -0,0 +1,48 @@
+"""
+Per-file parse cost of the DCS World diff.lua parser
+
+Run from the repository root: python benchmarks/bench_dcs_parse.py
+"""
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import adaptors.dcs_world as dcs  # noqa: E402
+
+DCS_DIRECTORY = os.path.join('tests', 'data', 'dcs_world', 'valid_dcs_world_directory')
+REPEAT = 200
+
+
+def load_diff_files() -> list[str]:
+    files = []
+    for diff_file in sorted(Path(DCS_DIRECTORY, 'Config', 'Input').glob('*/joystick/*.diff.lua')):
+        text = diff_file.read_text(encoding="utf-8")
+        files.append(text.replace('local diff = ', '').replace('return diff', ''))
+    return files
+
+
+def parse_rebuilding(files: list[str]) -> None:
+    """ Behaviour before the parser was cached, lexer and parser rebuilt for every file """
+    for text in files:
+        lexer, parser = dcs.build_lua_parser()
+        parser.parse(text, lexer=lexer)
+
+
+def parse_cached(files: list[str]) -> None:
+    for text in files:
+        lexer, parser = dcs.get_lua_parser()
+        parser.parse(text, lexer=lexer)
+
+
+def main() -> None:
+    files = load_diff_files()
+    for name, runner in [('rebuild per file', parse_rebuilding), ('cached parser', parse_cached)]:
+        seconds = min(timeit.repeat(lambda: runner(files), number=REPEAT, repeat=3))
+        print(f"{name:<20} {seconds / (REPEAT * len(files)) * 1000:8.3f} ms per file")
+
+
+if __name__ == '__main__':
+    main()
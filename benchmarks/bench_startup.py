@@ -0,0 +1,62 @@
+"""
+Import cost of the GUI main window module, measured with python -X importtime
+
+Run from the repository root: python benchmarks/bench_startup.py [--save]
+--save records the run as the baseline (benchmarks/startup_importtime_baseline.txt), otherwise the run is
+compared with it. Times are the median over the runs, in milliseconds.
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_importtime_baseline.txt')
+RUNS = 5
+# Modules the window does not need before it is shown
+WATCHED = ['main_window', 'PyQt5.QtWidgets', 'pygame', 'lxml.etree', 'ply', 'adaptors.dcs_world',
+           'adaptors.joystick_gremlin', 'classes.export', 'classes.visualizer', 'webbrowser']
+IMPORT_LINE = re.compile(r"import time:\s+\d+ \|\s+(?P<cumulative>\d+) \|(?P<indent>\s+)(?P<module>\S+)")
+
+
+def measure_once() -> dict[str, float]:
+    environment = dict(os.environ, PYTHONPATH='src', QT_QPA_PLATFORM='offscreen')
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main_window'],
+                               env=environment, capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and match.group('module') in WATCHED:
+            times[match.group('module')] = int(match.group('cumulative')) / 1000
+    return times
+
+
+def measure() -> dict[str, float]:
+    runs = [measure_once() for _ in range(RUNS)]
+    # A module missing from a run was not imported by main_window
+    return {module: statistics.median(run.get(module, 0.0) for run in runs) for module in WATCHED}
+
+
+def read_baseline() -> dict[str, float]:
+    baseline = {}
+    with open(BASELINE, encoding='utf-8') as baseline_file:
+        for line in baseline_file:
+            if line.strip() and not line.startswith('#'):
+                module, milliseconds = line.split()
+                baseline[module] = float(milliseconds)
+    return baseline
+
+
+if __name__ == '__main__':
+    current = measure()
+    if '--save' in sys.argv[1:]:
+        with open(BASELINE, 'w', encoding='utf-8') as baseline_file:
+            baseline_file.write("# python -X importtime -c 'import main_window', cumulative ms, median of "
+                                f"{RUNS} runs (0 = not imported)\n")
+            for module, milliseconds in current.items():
+                baseline_file.write(f"{module} {milliseconds:.1f}\n")
+        print(f"baseline saved to {BASELINE}")
+    baseline = read_baseline() if os.path.exists(BASELINE) else {}
+    print(f"{'module':<28}{'baseline ms':>12}{'current ms':>12}")
+    for module in WATCHED:
+        print(f"{module:<28}{baseline.get(module, float('nan')):>12.1f}{current[module]:>12.1f}")
@@ -0,0 +1,23 @@
+"""
+  Templates carry their editable draw.io diagram in the content attribute of the root svg element,
+  about half of every file. This script moves it into templates/drawio_sources.zip so the application
+  loads and exports slim templates, and puts it back before a template is edited in draw.io.
+
+  python compact_templates.py compact
+  python compact_templates.py restore
+"""
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from classes.template_archive import compact_templates, restore_templates
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2 or sys.argv[1] not in ('compact', 'restore'):
+        print(__doc__, file=sys.stderr)
+        sys.exit(1)
+    if sys.argv[1] == 'compact':
+        for template in compact_templates("templates"):
+            print(f"compacted {template}")
+    else:
+        for template in restore_templates("templates"):
+            print(f"restored {template}")
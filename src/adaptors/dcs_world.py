@@ -1,36 +1,59 @@
 """DCS World Lua Config Parser for use with Joystick Diagrams"""
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Union
+from typing import NamedTuple, Optional, Union
 
 import ply.lex as lex
 import ply.yacc as yacc
 import functions.helper as helper
 import adaptors.joystick_diagram_interface as jdi
+from adaptors.dcs_world_cache import DCSParseCache
+from adaptors.dcs_world_lua import iter_key_bindings, parse_lua_table
 import adaptors.dcs_world_lex  # Do not remove - PLY production requirement
 import adaptors.dcs_world_parse  # Do not remove - PLY production requirement
 
+PARSER_PLY = 'ply'  # PLY LALR grammar
+PARSER_FAST = 'fast'  # Single regex scanner in dcs_world_lua
+PARSER_BACKENDS = (PARSER_PLY, PARSER_FAST)
+
+
+class DeviceFile(NamedTuple):
+    """ A joystick diff file found while scanning a profile, with the stat data used as parse cache key """
+    profile: str
+    device: str
+    path: str
+    mtime_ns: int
+    size: int
+
 
 class DCSWorldParser(jdi.JDInterface):
     path: str
     remove_easy_modes: bool
-    joystick_listing: dict
     profiles_to_process: list
     file: str
-    profile_devices: list[str]
     base_directory: list[str]
     valid_profiles: list[str]
+    parser_backend: str
+    parse_cache: Optional[DCSParseCache]
+    profile_index: dict[str, list[DeviceFile]]
+    __input_entries: list[os.DirEntry]
     __easy_mode: str
 
-    def __init__(self, path: str, remove_easy_modes: bool = True):
+    def __init__(self, path: str, remove_easy_modes: bool = True, parser_backend: str = PARSER_PLY,
+                 parse_cache: Optional[DCSParseCache] = None):
         jdi.JDInterface.__init__(self)
+        if parser_backend not in PARSER_BACKENDS:
+            raise ValueError("DCS: Unknown parser backend {}".format(parser_backend))
         self.path: str = path
         self.remove_easy_modes: bool = remove_easy_modes
-        self.joystick_listing: dict = {}
+        self.parser_backend: str = parser_backend
+        self.parse_cache: Optional[DCSParseCache] = parse_cache
         self.profiles_to_process: list = []
         self.file: str = ''
-        self.profile_devices: list[str] = []
+        self.profile_index: dict[str, list[DeviceFile]] = {}
         self.base_directory: list[str] = self.__validate_base_directory()
         self.valid_profiles: list[str] = self.__validate_profiles()
         self.__easy_mode: str = '_easy'
@@ -43,12 +66,15 @@ class DCSWorldParser(jdi.JDInterface):
 
     def __validate_base_directory(self) -> list[str]:
         """validate the base directory structure, make sure there are files."""
-        if 'Config' not in os.listdir(self.path):
-            raise FileNotFoundError("DCS: No Config Folder found in DCS Folder.")
+        with os.scandir(self.path) as entries:
+            if not any(entry.name == 'Config' for entry in entries):
+                raise FileNotFoundError("DCS: No Config Folder found in DCS Folder.")
         try:
-            return os.listdir(os.path.join(self.path, 'Config', 'Input'))
+            with os.scandir(os.path.join(self.path, 'Config', 'Input')) as entries:
+                self.__input_entries = list(entries)
         except FileNotFoundError:
             raise FileNotFoundError("DCS: No input directory found")
+        return [entry.name for entry in self.__input_entries]
 
     def __validate_profiles(self) -> list[str]:
         """
@@ -57,24 +83,49 @@ class DCSWorldParser(jdi.JDInterface):
         if len(self.base_directory) <= 0:
             raise FileExistsError("DCS: No profiles exist in Input directory!")
         valid_items: list[str] = []
-        for item in self.base_directory:
-            valid = self.__validate_profile(item)
+        for entry in self.__input_entries:
+            valid = entry.is_dir() and self.__validate_profile(entry.name)
             if not valid:
-                helper.log("DCS: Profile {} has no joystick directory files".format(item))
+                helper.log("DCS: Profile {} has no joystick directory files".format(entry.name))
                 continue
-            valid_items.append(item)
+            valid_items.append(entry.name)
 
         return valid_items
 
-    def __validate_profile(self, item: str) -> Union[list[str], bool]:
+    def __validate_profile(self, item: str) -> Union[list[DeviceFile], bool]:
         """
         Validate Inidividual Profile
         Return Valid Profile
         """
-        # TODO add additional checking for rogue dirs/no files etc
-        if 'joystick' not in os.listdir(os.path.join(self.path, 'Config', 'Input', item)):
+        device_files = self.scan_profile(item)
+        if not device_files:
             return False
-        return os.listdir(os.path.join(self.path, 'Config', 'Input', item, 'joystick'))
+        return device_files
+
+    def scan_profile(self, profile: str) -> Optional[list[DeviceFile]]:
+        """
+        Device files of a profile's joystick folder from a single scandir, None when there is no joystick folder
+
+        The listing and stat data are kept in profile_index for the validation and processing steps
+        """
+        fq_path = os.path.join(self.path, 'Config', 'Input', profile, 'joystick')
+        try:
+            with os.scandir(fq_path) as entries:
+                joystick_listing = {}
+                for entry in entries:
+                    if entry.is_dir():
+                        continue
+                    stat = entry.stat()
+                    # TODO: magic number
+                    joystick_listing.update({
+                        entry.name[:-48]: DeviceFile(profile, entry.name[:-48], entry.path, stat.st_mtime_ns,
+                                                     stat.st_size)
+                    })
+        except (FileNotFoundError, NotADirectoryError):
+            self.profile_index.pop(profile, None)
+            return None
+        self.profile_index[profile] = list(joystick_listing.values())
+        return self.profile_index[profile]
 
     def get_validated_profiles(self) -> list[str]:
         """ Expose Valid Profiles only to UI """
@@ -87,7 +138,17 @@ class DCSWorldParser(jdi.JDInterface):
         """ Convert DCS Buttons to match expected "BUTTON_X" format """
         return button.split('_')[1].replace("BTN", "BUTTON_")
 
-    def process_profiles(self, profile_list: list[str] = None):
+    def process_profiles(self, profile_list: list[str] = None, stream_key_diffs: bool = False, jobs: int = 1,
+                         rescan: bool = False):
+        """
+        Parse the joystick files of each profile into the joystick dictionary
+
+        stream_key_diffs: scan keyDiffs entries as they are read and skip every other table,
+                          instead of building the whole file with parseFile
+        jobs: files are parsed in a process pool when > 1, results are merged in profile then file order
+        rescan: scan the profiles again instead of using the profile_index built during validation,
+                for parsers kept around while the files may change
+        """
         if profile_list is None:
             profile_list = []
         if len(profile_list) > 0:
@@ -96,149 +157,256 @@ class DCSWorldParser(jdi.JDInterface):
             self.profiles_to_process = self.get_validated_profiles()
 
         assert len(self.profiles_to_process) != 0, "DCS: There are no valid profiles to process"
-        for profile in self.profiles_to_process:
-            fq_path = os.path.join(self.path, 'Config', 'Input', profile, 'joystick')
-            self.profile_devices = os.listdir(os.path.join(fq_path))
-            self.joystick_listing = {}
-            for item in self.profile_devices:
-                # TODO: magic number
-                self.joystick_listing.update({
-                    item[:-48]: item
-                })
-            for joystick_device, joystick_file in self.joystick_listing.items():
-
-                if os.path.isdir(os.path.join(fq_path, joystick_file)):
-                    print("Skipping as Folder")
+        device_files = self.get_device_files(self.profiles_to_process, rescan)
+        button_arrays: list[Optional[dict[str, str]]] = [None] * len(device_files)
+
+        # Only files missing from the parse cache, or changed since they were cached, are parsed
+        pending: list[int] = []
+        cache_keys: dict[int, tuple] = {}
+        for index, device_file in enumerate(device_files):
+            if self.parse_cache is not None:
+                cache_keys[index] = self.get_cache_key(device_file, stream_key_diffs)
+                hit, button_arrays[index] = self.parse_cache.get(device_file.path, cache_keys[index])
+                if hit:
                     continue
-                try:
-                    self.file = Path(os.path.join(fq_path, joystick_file)).read_text(encoding="utf-8")
-                    self.file = self.file.replace('local diff = ', '')  # CLEAN UP
-                    self.file = self.file.replace('return diff', '')  # CLEAN UP
-                except FileNotFoundError:
-                    raise FileExistsError(
-                        "DCS: File {} no longer found - It has been moved/deleted from directory".format(
-                            joystick_file))
-                data = self.parseFile()
-                write_val = False
-                button_array = {}
-                if 'keyDiffs' in data.keys():
-                    for value in data['keyDiffs'].values():
-                        button = None
-                        name = None
-                        for item, attribute in value.items():
-                            if item == 'name':
-                                name = attribute
-                            if item == 'added':
-                                button = self.convert_button_format(attribute[1]['key'])
-                                write_val = True
-                        if write_val:
-                            button_array.update({
-                                button: name
-                            })
-                            write_val = False
-                    self.update_joystick_dictionary(joystick_device, profile, False, button_array)
+            pending.append(index)
+        file_paths = [device_files[index].path for index in pending]
+
+        if jobs > 1 and len(file_paths) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                parsed = list(executor.map(parse_device_file, file_paths,
+                                           repeat(self.parser_backend), repeat(stream_key_diffs),
+                                           chunksize=max(1, len(file_paths) // (jobs * 4))))
+        else:
+            parsed = [parse_device_file(file_path, self.parser_backend, stream_key_diffs)
+                      for file_path in file_paths]
+
+        for index, button_array in zip(pending, parsed):
+            button_arrays[index] = button_array
+            if self.parse_cache is not None:
+                self.parse_cache.store(device_files[index].path, cache_keys[index], button_array)
+        if self.parse_cache is not None:
+            self.parse_cache.save()
+
+        for device_file, button_array in zip(device_files, button_arrays):
+            if button_array is not None:
+                self.bindings.set_mode(device_file.device, device_file.profile, False, button_array)
         return self.joystick_dictionary
 
+    def get_cache_key(self, device_file: DeviceFile, stream_key_diffs: bool) -> tuple:
+        return device_file.mtime_ns, device_file.size, self.parser_backend, stream_key_diffs
+
+    def get_device_files(self, profiles: list[str], rescan: bool = False) -> list[DeviceFile]:
+        """ Every joystick file in the profiles, in processing order, from profile_index unless rescan is set """
+        device_files = []
+        for profile in profiles:
+            profile_files = self.profile_index.get(profile)
+            if rescan or profile_files is None:
+                profile_files = self.scan_profile(profile)
+            if profile_files is None:
+                raise FileNotFoundError("DCS: Profile {} has no joystick directory".format(profile))
+            device_files.extend(profile_files)
+        return device_files
+
+    @staticmethod
+    def extract_button_array(data: Optional[dict]) -> Optional[dict[str, str]]:
+        """ Buttons of a parsed diff file, None when the file has no keyDiffs """
+        if data is None or 'keyDiffs' not in data.keys():
+            return None
+        write_val = False
+        button_array = {}
+        for value in data['keyDiffs'].values():
+            button = None
+            name = None
+            for item, attribute in value.items():
+                if item == 'name':
+                    name = attribute
+                if item == 'added':
+                    button = DCSWorldParser.convert_button_format(attribute[1]['key'])
+                    write_val = True
+            if write_val:
+                button_array.update({
+                    button: name
+                })
+                write_val = False
+        return button_array
+
+    @staticmethod
+    def stream_button_array(file: str) -> Optional[dict[str, str]]:
+        """ Buttons read straight from the keyDiffs section of a diff file, None when it has none """
+        button_array = {}
+        bindings = iter_key_bindings(file)
+        try:
+            while True:
+                key, name = next(bindings)
+                button_array[DCSWorldParser.convert_button_format(key)] = name
+        except StopIteration as stop:
+            return button_array if stop.value else None
+        except ValueError as error:
+            print(error)
+            return None
+
     def parseFile(self):
-        # pylint: disable=unused-variable
-        tokens = (
-            'LCURLY', 'RCURLY', 'STRING', 'NUMBER', 'LBRACE', 'RBRACE', 'COMMA', 'EQUALS', 'TRUE', 'FALSE',
-            'DOUBLE_VAL')
-
-        t_LCURLY = r"\{"
-        t_RCURLY = r"\}"
-        t_LBRACE = r"\["
-        t_RBRACE = r"\]"
-        t_COMMA = r"\,"
-        t_EQUALS = r"\="
-
-        def t_DOUBLE_VAL(t):
-            r"(\+|\-)?[0-9]+\.[0-9]+"
-            t.value = float(t.value)
-            return t
-
-        def t_NUMBER(t):
-            r"[0-9]+"
-            t.value = int(t.value)
-            return t
-
-        def t_STRING(t):
-            r"\"[\w|\/|\(|\)|\-|\:|\+|\,|\&|\.|\'|\s]+\""
-            t.value = t.value[1:-1]
-            return t
-
-        def t_TRUE(t):
-            r'(true)'
-            t.value = True
-            return t
-
-        def t_FALSE(t):
-            r'(false)'
-            t.value = False
-            return t
-
-        t_ignore = " \t\n"
-
-        def t_error(t):
-            print("Illegal character '%s'" % t.value[0])
-            t.lexer.skip(1)
-
-        # Parsing rules
-
-        def p_dict(t):
-            """dict : LCURLY dvalues RCURLY"""
-            t[0] = t[2]
-
-        def p_dvalues(t):
-            """dvalues : dvalue
+        return parse_lua(self.file, self.parser_backend)
+
+
+def read_device_file(file_path: str) -> str:
+    """ Lua table of a diff file, without the surrounding local/return statements """
+    try:
+        file = Path(file_path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        raise FileExistsError(
+            "DCS: File {} no longer found - It has been moved/deleted from directory".format(
+                os.path.basename(file_path)))
+    file = file.replace('local diff = ', '')  # CLEAN UP
+    file = file.replace('return diff', '')  # CLEAN UP
+    return file
+
+
+def parse_lua(file: str, parser_backend: str = PARSER_PLY) -> Optional[dict]:
+    # Parse the data
+    data = None
+    try:
+        if parser_backend == PARSER_FAST:
+            data = parse_lua_table(file)
+        else:
+            lexer, parser = get_lua_parser()
+            data = parser.parse(file, lexer=lexer)
+    except Exception as error:
+        print(error)
+    return data
+
+
+def parse_device_file(file_path: str, parser_backend: str = PARSER_PLY,
+                      stream_key_diffs: bool = False) -> Optional[dict[str, str]]:
+    """
+    Button array of a single diff file, None when it has no keyDiffs
+
+    Depends on nothing but its arguments so it can run in a process pool worker
+    """
+    file = read_device_file(file_path)
+    if stream_key_diffs:
+        return DCSWorldParser.stream_button_array(file)
+    return DCSWorldParser.extract_button_array(parse_lua(file, parser_backend))
+
+
+# Lua table grammar, built into a lexer and parser once per process by get_lua_parser
+tokens = (
+    'LCURLY', 'RCURLY', 'STRING', 'NUMBER', 'LBRACE', 'RBRACE', 'COMMA', 'EQUALS', 'TRUE', 'FALSE',
+    'DOUBLE_VAL')
+
+t_LCURLY = r"\{"
+t_RCURLY = r"\}"
+t_LBRACE = r"\["
+t_RBRACE = r"\]"
+t_COMMA = r"\,"
+t_EQUALS = r"\="
+
+
+def t_DOUBLE_VAL(t):
+    r"(\+|\-)?[0-9]+\.[0-9]+"
+    t.value = float(t.value)
+    return t
+
+
+def t_NUMBER(t):
+    r"(\+|\-)?[0-9]+"
+    t.value = int(t.value)
+    return t
+
+
+def t_STRING(t):
+    r"\"[\w|\/|\(|\)|\-|\:|\+|\,|\&|\.|\'|\s]+\""
+    t.value = t.value[1:-1]
+    return t
+
+
+def t_TRUE(t):
+    r'(true)'
+    t.value = True
+    return t
+
+
+def t_FALSE(t):
+    r'(false)'
+    t.value = False
+    return t
+
+
+t_ignore = " \t\n"
+
+
+def t_error(t):
+    print("Illegal character '%s'" % t.value[0])
+    t.lexer.skip(1)
+
+
+# Parsing rules
+# Docstrings are kept verbatim so the signature matches the generated dcs_world_parse tables
+
+def p_dict(t):
+    """dict : LCURLY dvalues RCURLY"""
+    t[0] = t[2]
+
+
+def p_dvalues(t):
+    """dvalues : dvalue
                     | dvalue COMMA
                     | dvalue COMMA dvalues"""
-            t[0] = t[1]
-            if len(t) == 4:
-                t[0].update(t[3])
+    t[0] = t[1]
+    if len(t) == 4:
+        t[0].update(t[3])
+
 
-        def p_key_expression(t):
-            """key : LBRACE NUMBER RBRACE
+def p_key_expression(t):
+    """key : LBRACE NUMBER RBRACE
                 | LBRACE STRING RBRACE"""
-            t[0] = t[2]
+    t[0] = t[2]
 
-        def p_value_expression(t):
-            """ dvalue : key EQUALS STRING
+
+def p_value_expression(t):
+    """ dvalue : key EQUALS STRING
             | key EQUALS boolean
             | key EQUALS DOUBLE_VAL
             | key EQUALS NUMBER
             | key EQUALS dict """
-            t[0] = {t[1]: t[3]}
+    t[0] = {t[1]: t[3]}
+
 
-        def p_boolean(p):
-            ''' boolean : TRUE
+def p_boolean(p):
+    ''' boolean : TRUE
                         | FALSE
             '''
-            p[0] = p[1]
-
-        def p_error(t):
-            print("Syntax error at '%s'" % t.value)
-
-        # Build the lexer
-        ## TODO: Consider env vars to run optimize=1 in deployed version
-        lexer = lex.lex(
-            debug=False,
-            optimize=1,
-            lextab='dcs_world_lex',
-            reflags=re.UNICODE | re.VERBOSE
-        )
-
-        # Build the parser
-        parser = yacc.yacc(
-            debug=False,
-            optimize=1,
-            tabmodule='dcs_world_parse'
-        )
-
-        # Parse the data
-        data = None
-        try:
-            data = parser.parse(self.file)
-        except Exception as error:
-            print(error)
-        return data
+    p[0] = p[1]
+
+
+def p_error(t):
+    print("Syntax error at '%s'" % t.value)
+
+
+def build_lua_parser() -> tuple[lex.Lexer, yacc.LRParser]:
+    """ Build a new lexer and parser from the dcs_world_lex/dcs_world_parse tables """
+    ## TODO: Consider env vars to run optimize=1 in deployed version
+    lexer = lex.lex(
+        debug=False,
+        optimize=1,
+        lextab='dcs_world_lex',
+        reflags=re.UNICODE | re.VERBOSE
+    )
+    parser = yacc.yacc(
+        debug=False,
+        optimize=1,
+        tabmodule='dcs_world_parse'
+    )
+    return lexer, parser
+
+
+_lua_parser: Optional[tuple[lex.Lexer, yacc.LRParser]] = None
+
+
+def get_lua_parser() -> tuple[lex.Lexer, yacc.LRParser]:
+    """ Lexer and parser shared by every DCSWorldParser in the process, built on first use """
+    global _lua_parser
+    if _lua_parser is None:
+        _lua_parser = build_lua_parser()
+    return _lua_parser
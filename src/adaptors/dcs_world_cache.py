@@ -0,0 +1,79 @@
+"""Persistent cache of parsed DCS World diff files, so unchanged files are not parsed again between exports"""
+import os
+import pickle
+from typing import Hashable, Optional
+
+import functions.helper as helper
+
+CACHE_VERSION = 1
+
+ButtonArray = Optional[dict[str, str]]
+
+
+class DCSParseCache:
+    """
+    Button arrays extracted from diff files, stored in a pickle
+
+    Entries are looked up by file path and only used while their key still matches, the key holds the
+    file's mtime_ns and size plus the parser options used to produce the entry.
+    """
+    cache_path: str
+    _entries: dict[str, tuple[Hashable, ButtonArray]]
+    _seen: set[str]
+    _dirty: bool
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self._entries = self.load()
+        self._seen = set()
+        self._dirty = False
+
+    def load(self) -> dict[str, tuple[Hashable, ButtonArray]]:
+        try:
+            with open(self.cache_path, 'rb') as cache_file:
+                version, entries = pickle.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except Exception as error:
+            helper.log(f"DCS: Ignoring unreadable parse cache {self.cache_path}: {error}", 'warning')
+            return {}
+        if version != CACHE_VERSION:
+            return {}
+        return entries
+
+    def get(self, file_path: str, key: Hashable) -> tuple[bool, ButtonArray]:
+        """ (True, button array) when the cached entry for the file matches key, otherwise (False, None) """
+        file_path = os.path.abspath(file_path)
+        self._seen.add(file_path)
+        entry = self._entries.get(file_path)
+        if entry is not None and entry[0] == key:
+            return True, None if entry[1] is None else dict(entry[1])
+        return False, None
+
+    def store(self, file_path: str, key: Hashable, button_array: ButtonArray) -> None:
+        file_path = os.path.abspath(file_path)
+        self._seen.add(file_path)
+        self._entries[file_path] = (key, button_array)
+        self._dirty = True
+
+    def prune(self) -> None:
+        """ Drop entries of files that no longer exist """
+        for file_path in list(self._entries):
+            if file_path not in self._seen and not os.path.exists(file_path):
+                del self._entries[file_path]
+                self._dirty = True
+
+    def save(self) -> None:
+        self.prune()
+        self._seen.clear()
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        temporary_path = self.cache_path + '.tmp'
+        with open(temporary_path, 'wb') as cache_file:
+            pickle.dump((CACHE_VERSION, self._entries), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self.cache_path)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,175 @@
+"""Fast path reader for the Lua tables written to DCS World diff.lua files"""
+import re
+from typing import Any, Iterator, Optional
+
+# One alternative per token, the matched group name (lastgroup) is the token type
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<open>\{)
+      | (?P<close>\})
+      | \[\s*(?:(?P<int_key>[0-9]+)|"(?P<str_key>(?:[^"\\]|\\.)*)")\s*\]\s*=
+      | "(?P<string>(?:[^"\\]|\\.)*)"
+      | (?P<double>[+-]?[0-9]+\.[0-9]+)
+      | (?P<number>[+-]?[0-9]+)
+      | (?P<true>true)
+      | (?P<false>false)
+      | (?P<comma>,)
+    )""", re.VERBOSE)
+
+# What the PLY lexer makes tokens of, it skips any other character with an "Illegal character" message
+TRAILING_TOKEN_PATTERN = re.compile(r'[{}\[\],="0-9]|true|false')
+
+SCALAR_CONVERTERS = {
+    'string': str,
+    'double': float,
+    'number': int,
+    'true': lambda _: True,
+    'false': lambda _: False,
+}
+
+
+def parse_lua_table(text: str) -> dict:
+    """
+    Read a { [key] = value, ... } table into nested dicts
+
+    Produces the same dictionaries as the PLY grammar in dcs_world (strings are kept raw, integer keys stay ints)
+    using a single compiled regex and an explicit stack, so the cost is linear in the size of the file.
+    Tables the grammar rejects raise ValueError: empty tables, entries not separated by a single comma
+    and tokens left after the root table, other text after it is ignored like the PLY lexer does.
+    Strings are not limited to the characters the PLY lexer knows.
+    """
+    data, position = read_table(text, 0)
+    trailing = TRAILING_TOKEN_PATTERN.search(text, position)
+    if trailing is not None:
+        raise ValueError(f"DCS: Unexpected data after table at position {trailing.start()}")
+    return data
+
+
+def read_table(text: str, position: int) -> tuple[dict, int]:
+    """ Read the table starting at position, returns the table and the position after its closing brace """
+    match = TOKEN_PATTERN.match(text, position)
+    if match is None or match.lastgroup != 'open':
+        raise ValueError(f"DCS: Expected table at position {position}")
+    root: dict = {}
+    stack = [root]
+    key: Any = None
+    # After a value only a comma or the closing brace may follow
+    after_value = False
+    position = match.end()
+    next_token = TOKEN_PATTERN.match
+
+    while stack:
+        match = next_token(text, position)
+        if match is None:
+            raise ValueError(f"DCS: Unexpected character at position {position}")
+        position = match.end()
+        kind = match.lastgroup
+        start = match.start(kind)
+
+        if after_value:
+            if kind == 'comma':
+                after_value = False
+                continue
+            if kind != 'close':
+                raise ValueError(f"DCS: Expected , or }} at position {start}")
+        elif kind == 'comma':
+            raise ValueError(f"DCS: Unexpected , at position {start}")
+
+        if kind == 'int_key' or kind == 'str_key':
+            if key is not None:
+                raise ValueError(f"DCS: Missing value for key {key!r} at position {start}")
+            key = int(match.group(kind)) if kind == 'int_key' else match.group(kind)
+            continue
+        if kind == 'close':
+            if key is not None:
+                raise ValueError(f"DCS: Missing value for key {key!r} at position {start}")
+            if not stack[-1]:
+                raise ValueError(f"DCS: Empty table at position {start}")
+            stack.pop()
+            after_value = True
+            continue
+        if key is None:
+            raise ValueError(f"DCS: Value without key at position {start}")
+
+        if kind == 'open':
+            value: Any = {}
+            stack[-1][key] = value
+            stack.append(value)
+        else:
+            stack[-1][key] = SCALAR_CONVERTERS[kind](match.group(kind))
+            after_value = True
+        key = None
+
+    return root, position
+
+
+# Strings are matched whole so braces inside them are not counted
+SKIP_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}]')
+
+
+def skip_table(text: str, position: int) -> int:
+    """ Skip a table without building it, position is just after its opening brace """
+    depth = 1
+    for match in SKIP_PATTERN.finditer(text, position):
+        token = match.group()
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    raise ValueError(f"DCS: Unterminated table starting at position {position}")
+
+
+def iter_key_bindings(text: str, section: str = 'keyDiffs') -> Iterator[tuple[str, Optional[str]]]:
+    """
+    Yield (key, name) for every entry of the root section table (keyDiffs) that has an added key
+
+    Only the entries of that table are built, every other root level table (axisDiffs, force feedback...)
+    is skipped, so memory follows the number of bindings rather than the size of the file.
+    Skipped tables and the separators between root entries are not checked, only the entries read are.
+    The generator returns True when the section was present.
+    """
+    match = TOKEN_PATTERN.match(text, 0)
+    if match is None or match.lastgroup != 'open':
+        raise ValueError("DCS: Expected table at position 0")
+    position = match.end()
+    found = False
+    key: Any = None
+
+    while True:
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise ValueError(f"DCS: Unexpected character at position {position}")
+        kind = match.lastgroup
+        if kind == 'close':
+            return found
+        position = match.end()
+        if kind == 'comma':
+            continue
+        if kind in ('int_key', 'str_key'):
+            key = match.group(kind)
+            continue
+        if kind != 'open':
+            key = None
+            continue
+
+        if key != section:
+            position = skip_table(text, position)
+            continue
+        found = True
+        key = None
+        while True:
+            match = TOKEN_PATTERN.match(text, position)
+            if match is None:
+                raise ValueError(f"DCS: Unexpected character at position {position}")
+            kind = match.lastgroup
+            if kind == 'close':
+                position = match.end()
+                break
+            if kind == 'open':
+                entry, position = read_table(text, position)
+                if 'added' in entry:
+                    yield entry['added'][1]['key'], entry.get('name')
+                continue
+            position = match.end()
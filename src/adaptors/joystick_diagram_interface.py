@@ -1,14 +1,23 @@
 import functions.helper as helper
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from typing import Union
+
+from classes.bindings import BindingModel
 
 
 class JDInterface(ABC):
     no_bind_text: str
-    joystick_dictionary: dict[str, dict[str, dict]]
+    bindings: BindingModel
+    inheritance_cycles: dict[str, list[list[str]]]
+    layered_inheritance: bool
 
     def __init__(self):
         self.no_bind_text = "NO BIND"
-        self.joystick_dictionary = {}
+        self.bindings = BindingModel()
+        self.inheritance_cycles = {}
+        # Inheriting modes get InheritedButtons views over their parent instead of merged copies
+        self.layered_inheritance = False
 
     @abstractmethod
     def get_device_names(self) -> list[str]:
@@ -18,43 +27,33 @@ class JDInterface(ABC):
     def get_modes(self) -> list[str]:
         ...
 
-    def update_joystick_dictionary(self, device: str, mode: str, inherit: object, buttons: object) -> None:
-        data = {
-            "Buttons": buttons,
-            "Axis": "",
-            "Inherit": inherit}
-
-        if device in self.joystick_dictionary:
-            if mode in self.joystick_dictionary[device]:
-                self.joystick_dictionary[device][mode].update(data)
-            else:
-                self.joystick_dictionary[device].update({
-                    mode: data
-                })
-        else:
-            self.joystick_dictionary.update({
-                device: {
-                    mode: data
-                }
-            })
+    @property
+    def joystick_dictionary(self) -> dict[str, dict[str, dict]]:
+        """
+        The bindings in the device -> mode -> {'Buttons', 'Axis', 'Inherit'} shape
+
+        Built on first access and kept up to date by the bindings model afterwards, every access returns the
+        same dictionary. Assigning a dictionary replaces the bindings with its content.
+        """
+        return self.bindings.to_dict(self.no_bind_text)
+
+    @joystick_dictionary.setter
+    def joystick_dictionary(self, dictionary: dict[str, dict[str, dict]]) -> None:
+        self.bindings = BindingModel.from_dict(dictionary, self.no_bind_text)
+
+    def update_joystick_dictionary(self, device: str, mode: str, inherit: Union[bool, str],
+                                   buttons: Mapping[str, str]) -> None:
+        self.bindings.set_mode(device, mode, inherit, buttons)
 
     def inherit_joystick_dictionary(self) -> None:
-        for item in self.joystick_dictionary:
-            for profile in self.joystick_dictionary[item]:
-                if self.joystick_dictionary[item][profile]['Inherit']:
-                    helper.log(f"{item} Profile has inheritance in mode {profile}", 'debug')
-                    helper.log(f"Profile inherits from {self.joystick_dictionary[item][profile]['Inherit']}", 'debug')
-                    inherit = self.joystick_dictionary[item][profile]['Inherit']
-                    inherited_profile = self.joystick_dictionary[item][inherit]
-                    helper.log("Inherited Profile Contains {}".format(inherited_profile), 'debug')
-                    helper.log(f"Starting Profile Contains {self.joystick_dictionary[item][profile]['Buttons']}",
-                               'debug')
-                    for button, desc in inherited_profile['Buttons'].items():
-                        check_button = button in self.joystick_dictionary[item][profile]['Buttons']
-                        if not check_button:
-                            self.joystick_dictionary[item][profile]['Buttons'].update({
-                                button: desc
-                            })
-                        elif self.joystick_dictionary[item][profile]['Buttons'][button] == self.no_bind_text:
-                            self.joystick_dictionary[item][profile]['Buttons'][button] = desc
-                    helper.log(f"Ending Profile Contains {self.joystick_dictionary[item][profile]['Buttons']}", 'debug')
+        """
+        Merge inherited buttons into each mode, parents first so chains resolve in a single pass
+
+        Modes in an inheritance cycle keep their own buttons and are reported in inheritance_cycles.
+        With layered_inheritance the Buttons of inheriting modes become InheritedButtons views,
+        call materialize() on them where a plain dict is needed.
+        """
+        self.inheritance_cycles = self.bindings.resolve_inheritance(self.no_bind_text, self.layered_inheritance)
+        for device, cycles in self.inheritance_cycles.items():
+            for cycle in cycles:
+                helper.log(f"{device} has an inheritance cycle: {' -> '.join(cycle + [cycle[0]])}", 'error')
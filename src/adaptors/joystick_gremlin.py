@@ -1,37 +1,44 @@
 '''Joystick Gremlin (Version ~13) XML Parser for use with Joystick Diagrams'''
-import typing
-from typing import Union, Tuple
+from typing import NamedTuple, Union, Tuple
 
 from lxml import etree
-from xml.etree import ElementTree
-from xml.etree.ElementTree import Element
 
 import functions.helper as helper
 import adaptors.joystick_diagram_interface as jdi
 
 
+class GremlinMode(NamedTuple):
+    name: str
+    inherit: Union[bool, str]
+    buttons: dict[str, str]
+
+
+class GremlinDevice(NamedTuple):
+    name: str
+    modes: list[GremlinMode]
+
+
 class JoystickGremlin(jdi.JDInterface):
     filepath: str
-    devices: list[Element]
+    devices: list[GremlinDevice]
     deviceNames: list[str]
-    device: Element
-    tree: ElementTree
 
     def __init__(self, filepath):
         # TRY FIND PATH
         jdi.JDInterface.__init__(self)
-        self.tree = self.parse_xml_file(filepath)
+        self.filepath = filepath
 
         # New Attributes
         self.devices = []
         self.deviceNames = []
+        self.__loaded = False
 
     def get_device_names(self) -> list[str]:
         if not self.deviceNames:
             self.devices = self.get_devices()
             self.deviceNames = []
             for item in self.devices:
-                self.deviceNames.append(item.attrib['name'])
+                self.deviceNames.append(item.name)
         return self.deviceNames
 
     def get_modes(self) -> list[str]:
@@ -39,15 +46,39 @@ class JoystickGremlin(jdi.JDInterface):
         profile_modes = []
 
         item = self.devices[0]  # All Modes common across JG
-        modes = item.findall('mode')
-        for mode in modes:
-            mode_name = mode.attrib['name']
-            profile_modes.append(mode_name)
+        for mode in item.modes:
+            profile_modes.append(mode.name)
         return profile_modes
 
-    @staticmethod
-    def parse_xml_file(xml_file) -> ElementTree:
-        return etree.parse(xml_file)
+    def load_profile(self, xml_file) -> list[GremlinDevice]:
+        """
+        Devices, modes, inheritance and button descriptions from a single iterparse pass
+
+        Elements are cleared once read, so containers and macros below the buttons never accumulate in memory
+        """
+        devices: list[GremlinDevice] = []
+        modes: list[GremlinMode] = []
+        buttons: dict[str, str] = {}
+        # Attributes are still present on end events, children of a mode or device have all been seen by then
+        for _, element in etree.iterparse(xml_file, events=('end',), tag=('device', 'mode', 'button')):
+            parent = element.getparent()
+            if element.tag == 'button':
+                if parent.tag == 'mode' and parent.getparent().tag == 'device':
+                    button_id, description = self.extract_button(element.attrib)
+                    buttons[button_id] = description
+            elif element.tag == 'mode':
+                if parent.tag == 'device':
+                    current_inherit, _ = self.extract_inheritance(element.attrib)
+                    modes.append(GremlinMode(element.attrib['name'], current_inherit, buttons))
+                    buttons = {}
+            else:
+                devices.append(GremlinDevice(element.attrib['name'], modes))
+                modes = []
+
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        return devices
 
     def create_dictionary(self, profiles: list[str] = None) -> dict[str, dict[str, dict]]:
         if profiles is None:
@@ -57,16 +88,14 @@ class JoystickGremlin(jdi.JDInterface):
 
         using_inheritance = False
         for device in self.devices:
-            current_device = device.attrib['name']
-            modes = device.findall('mode')
-            helper.log(f"All Modes: {list(map(lambda e: e.attrib['name'], modes))}")
-            for mode in modes:
-                current_inherit, using_inheritance = self.extract_inheritance(mode)
-                current_mode = mode.attrib['name']
+            current_device = device.name
+            helper.log(f"All Modes: {list(map(lambda e: e.name, device.modes))}")
+            for mode in device.modes:
+                current_inherit = mode.inherit
+                using_inheritance = using_inheritance or bool(current_inherit)
+                current_mode = mode.name
                 helper.log(f"Selected Mode: {current_mode}", 'debug')
-                buttons = mode.findall('button')
-                button_array = self.extract_buttons(buttons)
-                self.update_joystick_dictionary(current_device, current_mode, current_inherit, button_array)
+                self.bindings.set_mode(current_device, current_mode, current_inherit, mode.buttons)
         if using_inheritance:
             self.inherit_joystick_dictionary()
             self.filter_dictionary(profiles)
@@ -75,35 +104,27 @@ class JoystickGremlin(jdi.JDInterface):
             self.filter_dictionary(profiles)
             return self.joystick_dictionary
 
-    # TODO: this dict needs better typing
     def filter_dictionary(self, profiles: list[str]) -> dict[str, dict[str, dict]]:
-        if len(profiles) > 0:
-            for key, value in self.joystick_dictionary.items():
-                for item in value.copy():
-                    if item not in profiles:
-                        self.joystick_dictionary[key].pop(item, None)
+        self.bindings.filter_modes(profiles)
         return self.joystick_dictionary
 
-    def get_devices(self) -> list[Element]:
-        if not self.devices:
-            self.devices = self.tree.findall('.//device')
+    def get_devices(self) -> list[GremlinDevice]:
+        if not self.__loaded:
+            self.devices = self.load_profile(self.filepath)
+            self.__loaded = True
         return self.devices
 
     @staticmethod
-    def extract_inheritance(mode: Element) -> Tuple[Union[bool, str], bool]:
-        if 'inherit' not in mode.attrib or mode.attrib['inherit'] == '':
+    def extract_inheritance(attrib: dict[str, str]) -> Tuple[Union[bool, str], bool]:
+        if 'inherit' not in attrib or attrib['inherit'] == '':
             return False, False
-        return mode.attrib['inherit'], True
-
-    def extract_buttons(self, buttons: list[Element]) -> dict[str, str]:
-        button_array = {}
-        for button in buttons:
-            description = button.attrib.get('description', default=self.no_bind_text)
-            if description == '':
-                description = self.no_bind_text
-            button_id = button.attrib['id']
-            button_array[f"BUTTON_{button_id}"] = description
-        return button_array
+        return attrib['inherit'], True
+
+    def extract_button(self, attrib: dict[str, str]) -> Tuple[str, str]:
+        description = attrib.get('description', default=self.no_bind_text)
+        if description == '':
+            description = self.no_bind_text
+        return f"BUTTON_{attrib['id']}", description
 
     def get_device_count(self) -> int:
         return len(self.get_devices())
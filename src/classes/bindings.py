@@ -0,0 +1,301 @@
+"""Bindings read from a profile: devices, their modes and the description bound to each button"""
+from array import array
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import functions.helper as helper
+
+BUTTON_PREFIX = 'BUTTON_'
+# Buttons are stored by number below this index, higher numbers and other keys are stored by name
+MAX_BUTTON_INDEX = 1024
+
+_MISSING = object()
+
+
+def button_index(key: str) -> int:
+    """ Number of a BUTTON_N key, -1 for any other key """
+    if not key.startswith(BUTTON_PREFIX):
+        return -1
+    number = key[len(BUTTON_PREFIX):]
+    # Only the canonical spelling, so the key can be rebuilt from the number
+    if not number.isascii() or not number.isdigit() or str(int(number)) != number:
+        return -1
+    index = int(number)
+    return index if index < MAX_BUTTON_INDEX else -1
+
+
+def resolve_inheritance_order(parents: dict[str, Union[bool, str]]) -> tuple[list[str], list[list[str]]]:
+    """
+    Order modes so every parent comes before the modes inheriting from it
+
+    parents: mode -> inherited mode (False when the mode does not inherit)
+    Returns the order and the inheritance cycles found, modes in a cycle are left out of the order.
+    Each mode has a single parent, so walking up each chain once keeps this linear in the number of modes.
+    """
+    order: list[str] = []
+    cycles: list[list[str]] = []
+    resolved: set[str] = set()
+    for mode in parents:
+        chain: list[str] = []
+        node = mode
+        while node is not None and node not in resolved:
+            if node in chain:
+                cycle = chain[chain.index(node):]
+                cycles.append(cycle)
+                resolved.update(cycle)
+                break
+            chain.append(node)
+            parent = parents[node]
+            node = parent if parent and parent in parents else None
+        for node in reversed(chain):
+            if node not in resolved:
+                order.append(node)
+                resolved.add(node)
+    return order, cycles
+
+
+class InheritedButtons(Mapping):
+    """
+    Buttons of an inheriting mode layered over its parent's buttons, without copying them
+
+    Lookups fall through to the parent when the mode does not bind the button or binds it to no_bind_text.
+    Iteration gives the mode's own buttons, then the parent's buttons the mode does not have, the same order
+    as merging the parent into a copy of the mode's buttons.
+    """
+    __slots__ = ('own', 'parent', 'no_bind_text')
+
+    def __init__(self, own: dict[str, str], parent: Mapping, no_bind_text: str):
+        self.own = own
+        self.parent = parent
+        self.no_bind_text = no_bind_text
+
+    def __getitem__(self, button: str) -> str:
+        description = self.own.get(button, _MISSING)
+        if description is _MISSING:
+            return self.parent[button]
+        if description == self.no_bind_text:
+            return self.parent.get(button, description)
+        return description
+
+    def __contains__(self, button: object) -> bool:
+        return button in self.own or button in self.parent
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.own
+        for button in self.parent:
+            if button not in self.own:
+                yield button
+
+    def __len__(self) -> int:
+        return len(self.own) + sum(1 for button in self.parent if button not in self.own)
+
+    def materialize(self) -> dict[str, str]:
+        """ Plain dict of the resolved buttons """
+        return dict(self.items())
+
+
+@dataclass
+class Binding:
+    __slots__ = ('key', 'description')
+    key: str
+    description: str
+
+
+@dataclass
+class Mode:
+    """
+    Buttons bound in a mode
+
+    descriptions is indexed by button number and bound holds the bound numbers in the order they were read.
+    Unbound numbers hold _MISSING, a button can be bound to None (DCS entries without a name).
+    Keys that are not BUTTON_N are kept in other.
+    parent is set when the mode is layered over the mode it inherits from rather than holding merged copies.
+    The resolved buttons are built once per no_bind_text and kept until the mode changes (see buttons).
+    """
+    __slots__ = ('name', 'inherit', 'descriptions', 'bound', 'other', 'parent', '_view', '_view_no_bind_text')
+    name: str
+    inherit: Union[bool, str]
+    descriptions: list[Union[str, None, object]]
+    bound: array
+    other: dict[str, str]
+    parent: Optional['Mode']
+
+    def __post_init__(self):
+        self._view: Optional[Mapping[str, str]] = None
+        self._view_no_bind_text: Optional[str] = None
+
+    @classmethod
+    def from_buttons(cls, name: str, inherit: Union[bool, str], buttons: Mapping[str, str]) -> 'Mode':
+        mode = cls(name, inherit, [], array('H'), {}, None)
+        for key, description in buttons.items():
+            mode.set(key, description)
+        return mode
+
+    def set(self, key: str, description: str) -> None:
+        self._view = None
+        index = button_index(key)
+        if index < 0:
+            self.other[key] = description
+            return
+        if index >= len(self.descriptions):
+            self.descriptions.extend([_MISSING] * (index + 1 - len(self.descriptions)))
+        if self.descriptions[index] is _MISSING:
+            self.bound.append(index)
+        self.descriptions[index] = description
+
+    def get(self, key: str) -> Optional[str]:
+        """ The mode's own description of key, inherited buttons are not looked up """
+        index = button_index(key)
+        if index < 0:
+            return self.other.get(key)
+        if index < len(self.descriptions):
+            description = self.descriptions[index]
+            return None if description is _MISSING else description
+        return None
+
+    def bindings(self) -> Iterator[Binding]:
+        """ The mode's own bindings """
+        descriptions = self.descriptions
+        for index in self.bound:
+            yield Binding(f"{BUTTON_PREFIX}{index}", descriptions[index])
+        for key, description in self.other.items():
+            yield Binding(key, description)
+
+    def own_buttons(self) -> dict[str, str]:
+        return {binding.key: binding.description for binding in self.bindings()}
+
+    def buttons(self, no_bind_text: str) -> Mapping[str, str]:
+        """
+        Resolved buttons, an InheritedButtons view when the mode is layered over its parent
+
+        The result is cached, so every mode inheriting from this one is layered over the same view, it must not
+        be modified. Views already built keep the buttons they had when a parent changes after inheritance
+        was resolved.
+        """
+        if self._view is None or self._view_no_bind_text != no_bind_text:
+            if self.parent is None:
+                self._view = self.own_buttons()
+            else:
+                self._view = InheritedButtons(self.own_buttons(), self.parent.buttons(no_bind_text), no_bind_text)
+            self._view_no_bind_text = no_bind_text
+        return self._view
+
+    def layer_over(self, parent: 'Mode') -> None:
+        """ Resolve buttons through the parent's view instead of merging its buttons in """
+        self.parent = parent
+        self._view = None
+
+    def merge_parent(self, parent: 'Mode', no_bind_text: str) -> None:
+        """ Copy the parent's resolved buttons into unbound and no_bind_text buttons """
+        for key, description in parent.buttons(no_bind_text).items():
+            own = self.get(key)
+            if own is None or own == no_bind_text:
+                self.set(key, description)
+
+    def __len__(self) -> int:
+        return len(self.bound) + len(self.other)
+
+
+@dataclass
+class Device:
+    __slots__ = ('name', 'modes')
+    name: str
+    modes: dict[str, Mode]
+
+    def resolve_inheritance(self, no_bind_text: str, layered: bool = False) -> list[list[str]]:
+        """ Resolve the modes parents first, returns the inheritance cycles left unresolved """
+        order, cycles = resolve_inheritance_order({name: mode.inherit for name, mode in self.modes.items()})
+        for name in order:
+            mode = self.modes[name]
+            if not mode.inherit:
+                continue
+            parent = self.modes.get(mode.inherit)
+            if parent is None:
+                helper.log(f"{self.name} mode {name} inherits from unknown mode {mode.inherit}", 'warning')
+                continue
+            helper.log(f"{self.name} mode {name} inherits from {mode.inherit}", 'debug')
+            if layered:
+                mode.layer_over(parent)
+            else:
+                mode.merge_parent(parent, no_bind_text)
+        return cycles
+
+
+class BindingModel:
+    """
+    Devices by name, filled by the parsers and exposed to exporters through to_dict
+
+    to_dict builds the dictionary once and keeps returning that dictionary, set_mode, resolve_inheritance and
+    filter_modes write the entries they change into it. Edits made to other entries of the dictionary are kept,
+    they are not read back into the model.
+    """
+    devices: dict[str, Device]
+    _dictionary: Optional[dict[str, dict[str, dict]]]
+    _no_bind_text: Optional[str]
+
+    def __init__(self):
+        self.devices = {}
+        self._dictionary = None
+        self._no_bind_text = None
+
+    @classmethod
+    def from_dict(cls, dictionary: dict[str, dict[str, dict]], no_bind_text: str) -> 'BindingModel':
+        """ Model of a dictionary in the to_dict shape, to_dict returns that same dictionary """
+        model = cls()
+        for device, modes in dictionary.items():
+            for mode, entry in modes.items():
+                model.set_mode(device, mode, entry.get('Inherit', False), entry.get('Buttons', {}))
+        model._dictionary = dictionary
+        model._no_bind_text = no_bind_text
+        return model
+
+    def set_mode(self, device: str, mode: str, inherit: Union[bool, str], buttons: Mapping[str, str]) -> Mode:
+        """ Add a mode to device, replacing any mode of the same name """
+        if device not in self.devices:
+            self.devices[device] = Device(device, {})
+        mode_bindings = Mode.from_buttons(mode, inherit, buttons)
+        self.devices[device].modes[mode] = mode_bindings
+        if self._dictionary is not None:
+            self._dictionary.setdefault(device, {})[mode] = self.mode_entry(mode_bindings, self._no_bind_text)
+        return mode_bindings
+
+    def resolve_inheritance(self, no_bind_text: str, layered: bool = False) -> dict[str, list[list[str]]]:
+        """ Resolve inheritance of every device, returns the inheritance cycles by device """
+        cycles = {}
+        for name, device in self.devices.items():
+            device_cycles = device.resolve_inheritance(no_bind_text, layered)
+            if device_cycles:
+                cycles[name] = device_cycles
+            if self._dictionary is not None:
+                entries = self._dictionary.setdefault(name, {})
+                for mode in device.modes.values():
+                    if mode.inherit:
+                        entries[mode.name] = self.mode_entry(mode, self._no_bind_text)
+        return cycles
+
+    def filter_modes(self, modes: list[str]) -> None:
+        """ Keep only the given modes, every mode is kept when modes is empty """
+        if not modes:
+            return
+        for device in self.devices.values():
+            for name in list(device.modes):
+                if name not in modes:
+                    del device.modes[name]
+                    if self._dictionary is not None:
+                        self._dictionary.get(device.name, {}).pop(name, None)
+
+    def to_dict(self, no_bind_text: str) -> dict[str, dict[str, dict]]:
+        """ Device -> mode -> {'Buttons', 'Axis', 'Inherit'} dictionary used by the exporters """
+        if self._dictionary is None or no_bind_text != self._no_bind_text:
+            self._no_bind_text = no_bind_text
+            self._dictionary = {
+                device.name: {mode.name: self.mode_entry(mode, no_bind_text) for mode in device.modes.values()}
+                for device in self.devices.values()}
+        return self._dictionary
+
+    @staticmethod
+    def mode_entry(mode: Mode, no_bind_text: str) -> dict:
+        # Callers may edit plain Buttons dicts, so they get a copy rather than the dict cached on the mode
+        buttons = mode.own_buttons() if mode.parent is None else mode.buttons(no_bind_text)
+        return {"Buttons": buttons, "Axis": "", "Inherit": mode.inherit}
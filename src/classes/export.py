@@ -1,12 +1,105 @@
 from os import path
+import gzip
+import io
 import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 import re
-import html
-from typing import Any
+import threading
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, TextIO
+import zipfile
 
+import config
 import functions.helper as helper
-from PyQt5 import QtWidgets
+from classes.export_manifest import ExportManifest, content_hash
+from classes.template_engine import CompiledTemplate, template_cache
+
+# Called with the percentage of diagrams done, from the thread running export_config
+ProgressCallback = Callable[[int], None]
+
+# svg files, gzip compressed svgz files, or one zip archive of svg files per export
+OUTPUT_FORMATS = ('svg', 'svgz', 'zip')
+COMPRESS_LEVEL = 6
+
+
+class ExportJob(NamedTuple):
+    """ Everything needed to render and save one (device, mode) diagram, picklable for process pools """
+    template_path: str
+    output_path: str
+    buttons: dict[str, str]
+    no_bind_text: str
+    title: str
+    output_format: str = 'svg'
+    # Content hashing for the export manifest, the file is left alone when its hash is still previous_hash
+    content_tracked: bool = False
+    previous_hash: Optional[str] = None
+
+
+class ExportResult(NamedTuple):
+    output_path: str
+    sha256: Optional[str]
+    written: bool
+    # Set when the diagram could not be rendered
+    error: Optional[str] = None
+
+
+def render_export_job(job: ExportJob) -> Optional[list[str]]:
+    """ Rendered parts, None when the template was removed or became unreadable since the job was created """
+    compiled_template = template_cache.get(job.template_path)
+    if compiled_template is None:
+        return None
+    return compiled_template.render_parts(job.buttons.items(), job.no_bind_text, title=job.title)
+
+
+def missing_template_error(job: ExportJob) -> str:
+    return "No Template for: {}".format(Path(job.template_path).stem)
+
+
+def run_export_job(job: ExportJob) -> ExportResult:
+    """ Render and write the diagram of an svg or svgz job """
+    parts = render_export_job(job)
+    if parts is None:
+        return ExportResult(job.output_path, None, False, missing_template_error(job))
+    sha256 = content_hash(parts) if job.content_tracked else None
+    if sha256 is not None and sha256 == job.previous_hash:
+        return ExportResult(job.output_path, sha256, False)
+    write_template(job.output_path, parts, job.output_format == 'svgz')
+    return ExportResult(job.output_path, sha256, True)
+
+
+def render_archive_entry(job: ExportJob) -> tuple[str, Optional[list[str]]]:
+    """ Entry name and rendered parts of a zip job, the archive itself is written by the exporting process """
+    return os.path.basename(job.output_path), render_export_job(job)
+
+
+def write_parts(output_file: TextIO, parts: Iterable[str]) -> None:
+    """ The stream's own buffer bounds memory, the rendered parts are never joined """
+    for part in parts:
+        output_file.write(part)
+
+
+def write_template(output_path: str, template: Iterable[str], compress: bool = False) -> None:
+    """ template: the document, or its parts as returned by CompiledTemplate.render_parts """
+    if isinstance(template, str):
+        template = [template]
+    try:
+        if compress:
+            output_file = gzip.open(output_path, "wt", encoding="UTF-8", compresslevel=COMPRESS_LEVEL)
+        else:
+            output_file = open(output_path, "w", encoding="UTF-8")
+        with output_file:
+            write_parts(output_file, template)
+    except PermissionError as e:
+        helper.log(str(e) + 'error')
+        raise
+
+
+def write_archive_entry(archive: zipfile.ZipFile, name: str, template: Iterable[str]) -> None:
+    with io.TextIOWrapper(archive.open(name, "w"), encoding="UTF-8") as output_file:
+        write_parts(output_file, template)
+
 
 # TODO: use lxml
 class Export:
@@ -18,6 +111,12 @@ class Export:
     no_bind_text: str
     executor: str
     error_bucket: list
+    jobs: int
+    pool: str
+    output_format: str
+    manifest: Optional[ExportManifest]
+    remove_stale: bool
+    source: str
 
     def __init__(self, joystick_listing: dict[str, dict[str, dict]], parser_id: str = "UNKNOWN",
                  custom_no_bind: str = "No Bind"):
@@ -29,39 +128,168 @@ class Export:
         self.no_bind_text = custom_no_bind
         self.executor = parser_id
         self.error_bucket = []
+        self.jobs = config.export_jobs
+        self.pool = config.export_pool
+        self.output_format = config.export_format
+        # Set by the caller to skip unchanged diagrams, remove_stale also deletes diagrams of modes no longer
+        # exported from the same source (profile file or game directory), only use it when every mode is exported
+        self.manifest = None
+        self.remove_stale = False
+        self.source = ''
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """ Stop a running export_config from any thread, diagrams already being rendered are still saved """
+        self._cancel_event.set()
 
-    def export_config(self, progress_bar: QtWidgets.QProgressBar = None) -> list[str]:
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
 
-        joystick_count = len(self.joystick_listing)
+    def export_config(self, progress_callback: ProgressCallback = None) -> list[str]:
+        """
+        Render and save every (device, mode) diagram
 
-        progress_increment = 1
+        With jobs > 1 the work is spread over a thread or process pool (see pool), the files written
+        and the errors returned are the same as for the serial export.
+        output_format zip writes one archive per export (see get_archive_path) instead of separate files.
+        With a manifest, svg and svgz files whose content did not change are not written again and the
+        written, unchanged and removed counts are added to the returned list.
+        progress_callback gets the percentage done after each diagram, it is not called with 100 when the export
+        was cancelled (see cancel), a cancelled zip export leaves no archive.
+        """
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown export format {self.output_format}, expected one of {OUTPUT_FORMATS}")
+        export_jobs = self.create_export_jobs()
+        # Every template of the export stays compiled, also for the next export
+        template_cache.reserve(len({job.template_path for job in export_jobs}))
+        if export_jobs and not os.path.exists(self.export_directory):
+            self.create_directory(self.export_directory)
+
+        if progress_callback:
+            progress_callback(0)
 
-        if isinstance(progress_bar, QtWidgets.QProgressBar):
-            progress_bar.setValue(0)
-            progress_increment = 100 / joystick_count
+        if self.output_format == 'zip':
+            if export_jobs:
+                self.export_archive(export_jobs, progress_callback)
+        else:
+            self.export_files(export_jobs, progress_callback)
 
+        if self.cancelled:
+            self.error_bucket.append("Export cancelled")
+        elif progress_callback:
+            progress_callback(100)
+        return self.error_bucket
+
+    def export_files(self, export_jobs: list[ExportJob], progress_callback: ProgressCallback = None) -> None:
+        written = 0
+        completed = 0
+        for result in self.run_export_jobs(run_export_job, export_jobs, progress_callback):
+            if result.error is not None:
+                self.report_error(result.error)
+                continue
+            completed += 1
+            if result.written:
+                written += 1
+                if self.manifest is not None:
+                    self.manifest.record(result.output_path, self.executor, self.source, result.sha256)
+        if self.manifest is None:
+            return
+        removed = 0
+        if self.remove_stale and not self.cancelled:
+            removed = self.manifest.remove_stale(self.export_directory, self.executor, self.source,
+                                                 [job.output_path for job in export_jobs])
+        self.manifest.save()
+        self.error_bucket.append("Diagrams written: {}, unchanged: {}, removed: {}".format(
+            written, completed - written, removed))
+
+    def export_archive(self, export_jobs: list[ExportJob], progress_callback: ProgressCallback = None) -> None:
+        archive_path = self.get_archive_path()
+        temporary_path = archive_path + ".tmp"
+        try:
+            with zipfile.ZipFile(temporary_path, "w", compression=zipfile.ZIP_DEFLATED,
+                                 compresslevel=COMPRESS_LEVEL) as archive:
+                # Results come in job order, see run_export_jobs
+                for job, (name, parts) in zip(export_jobs, self.run_export_jobs(render_archive_entry, export_jobs,
+                                                                                progress_callback)):
+                    if parts is None:
+                        self.report_error(missing_template_error(job))
+                        continue
+                    write_archive_entry(archive, name, parts)
+        except BaseException:
+            # A failed render or write leaves no partial archive behind
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        if self.cancelled:
+            os.remove(temporary_path)
+        else:
+            os.replace(temporary_path, archive_path)
+
+    def run_export_jobs(self, function: Callable[[ExportJob], Any], export_jobs: list[ExportJob],
+                        progress_callback: ProgressCallback = None) -> Iterator[Any]:
+        """
+        Results of function for each job, in job order also when pooled (zip entries keep a stable order)
+
+        At most twice as many jobs as workers are in flight, so rendered documents waiting to be written
+        stay bounded. No job is started once the export is cancelled.
+        """
+        def report(completed: int) -> None:
+            if progress_callback:
+                progress_callback(int(completed * 100 / len(export_jobs)))
+
+        if self.jobs > 1 and len(export_jobs) > 1:
+            with self.create_executor() as executor:
+                remaining = iter(export_jobs)
+                pending = deque() if self.cancelled else deque(executor.submit(function, job)
+                                                               for job in islice(remaining, self.jobs * 2))
+                completed = 0
+                while pending:
+                    result = pending.popleft().result()
+                    # Refill before handing the result over, the workers keep rendering while it is written
+                    if not self.cancelled:
+                        for job in islice(remaining, 1):
+                            pending.append(executor.submit(function, job))
+                    yield result
+                    completed += 1
+                    report(completed)
+        else:
+            for completed, job in enumerate(export_jobs, 1):
+                if self.cancelled:
+                    break
+                yield function(job)
+                report(completed)
+
+    def create_export_jobs(self) -> list[ExportJob]:
+        export_jobs = []
         for joystick in self.joystick_listing:
-            base_template = self.get_template(joystick)
-            if base_template:
-                progress_increment_modes = len(self.joystick_listing[joystick])
+            # Only checked here, the template is compiled where it is rendered (a pool worker may have its own cache)
+            if os.path.isfile(self.get_template_path(joystick)):
                 for mode in self.joystick_listing[joystick]:
-                    write_template = base_template
-                    completed_template = self.replace_template_strings(joystick, mode, write_template)
-                    completed_template = self.replace_unused_strings(completed_template)
-                    completed_template = self.brand_template(mode, completed_template)
-                    self.save_template(joystick, mode, completed_template)
-                    if isinstance(progress_bar, QtWidgets.QProgressBar):
-                        progress_bar.setValue(
-                            int(progress_bar.value() + (progress_increment / progress_increment_modes)))
-            else:
+                    output_path = self.get_output_path(joystick, mode)
+                    content_tracked = self.manifest is not None and self.output_format != 'zip'
+                    export_jobs.append(ExportJob(
+                        self.get_template_path(joystick),
+                        output_path,
+                        dict(self.joystick_listing[joystick][mode]['Buttons']),
+                        self.no_bind_text,
+                        mode,
+                        self.output_format,
+                        content_tracked,
+                        self.manifest.unchanged_hash(output_path) if content_tracked else None))
+            elif self.joystick_listing[joystick]:
                 self.error_bucket.append("No Template for: {}".format(joystick))
+        return export_jobs
 
-            if isinstance(progress_bar, QtWidgets.QProgressBar):
-                progress_bar.setValue(progress_bar.value() + progress_increment)
+    def report_error(self, error: str) -> None:
+        helper.log(error, 'error')
+        if error not in self.error_bucket:
+            self.error_bucket.append(error)
 
-        if isinstance(progress_bar, QtWidgets.QProgressBar):
-            progress_bar.setValue(100)
-        return self.error_bucket
+    def create_executor(self) -> Executor:
+        if self.pool == 'thread':
+            return ThreadPoolExecutor(max_workers=self.jobs)
+        return ProcessPoolExecutor(max_workers=self.jobs)
 
     def update_progress(self) -> None:
         pass
@@ -81,6 +309,9 @@ class Export:
     def get_template(self, joystick: str) -> str:
         return self.get_template_from_dir(joystick, self.templates_directory)
 
+    def get_template_path(self, joystick: str) -> str:
+        return os.path.join(self.templates_directory, joystick + ".svg")
+
     @staticmethod
     def get_template_from_dir(joystick: str, templates_directory: str) -> str:
         if path.exists(templates_directory + joystick + ".svg"):
@@ -89,30 +320,29 @@ class Export:
         else:
             return "False"
 
+    def get_output_path(self, joystick: str, mode: str) -> str:
+        extension = ".svgz" if self.output_format == 'svgz' else ".svg"
+        return self.export_directory + self.executor + "_" + joystick + "_" + mode + extension
+
+    def get_archive_path(self) -> str:
+        return self.export_directory + self.executor + "_diagrams.zip"
+
     def save_template(self, joystick, mode, template):
-        output_path = self.export_directory + self.executor + "_" + joystick + "_" + mode + ".svg"
         if not os.path.exists(self.export_directory):
             self.create_directory(self.export_directory)
-        try:
-            output_file = open(output_path, "w", encoding="UTF-8")
-            output_file.write(template)
-            output_file.close()
-        except PermissionError as e:
-            helper.log(str(e) + 'error')
-            raise
+        write_template(self.get_output_path(joystick, mode), template)
+
+    def render_template(self, device: str, mode: str, compiled_template: CompiledTemplate) -> str:
+        """ Bindings, unused buttons and branding in a single pass over the template """
+        items = self.joystick_listing[device][mode]['Buttons'].items()
+        return compiled_template.render(items, self.no_bind_text, title=mode)
 
     def replace_unused_strings(self, template):
         return self.replace_unused_strings_with_no_bind_text(template, self.no_bind_text)
 
     @staticmethod
     def replace_unused_strings_with_no_bind_text(template: str, no_bind_text: str) -> str:
-        regex_search = "\\bButton_\\d+\\b"
-        matches = re.findall(regex_search, template, flags=re.IGNORECASE)
-        matches = list(dict.fromkeys(matches))
-        for i in matches:
-            search = "\\b" + i + "\\b"
-            template = re.sub(search, html.escape(no_bind_text), template, flags=re.IGNORECASE)
-        return template
+        return CompiledTemplate(template).render((), no_bind_text)
 
     def replace_template_strings(self, device, mode, template):
         items = self.joystick_listing[device][mode]['Buttons'].items()
@@ -120,12 +350,7 @@ class Export:
 
     @staticmethod
     def replace_template_strings_in_items(items: list[tuple[str, Any]], no_bind_text, template):
-        for b, v in items:
-            if v == "NO BIND":
-                v = no_bind_text
-            regex_search = "\\b" + b + "\\b"
-            template = re.sub(regex_search, html.escape(str(v)), template, flags=re.IGNORECASE)
-        return template
+        return CompiledTemplate(template).render(items, no_bind_text, fill_unbound=False)
 
     @staticmethod
     def brand_template(title: str, template: str) -> str:
@@ -0,0 +1,131 @@
+"""Content hashes of exported diagrams, so re-exports only write the diagrams that changed"""
+import hashlib
+import json
+import os
+from typing import Iterable, NamedTuple, Optional
+
+import functions.helper as helper
+
+MANIFEST_VERSION = 2
+
+
+class ManifestEntry(NamedTuple):
+    parser: str
+    # Profile file or game directory the diagram was exported from
+    source: str
+    sha256: str
+    size: int
+    mtime_ns: int
+
+
+def content_hash(parts: Iterable[str]) -> str:
+    """ sha256 of the rendered document, as written in utf-8 """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def normalize_source(source: str) -> str:
+    return os.path.abspath(source) if source else ''
+
+
+class ExportManifest:
+    """
+    Output path -> hash of the content written there, stored as json
+
+    A file only counts as unchanged while its size and mtime still match what was recorded when it was written,
+    so diagrams edited or deleted outside the application are written again.
+    Entries of output directories that no longer exist are dropped when the manifest is saved.
+    """
+    manifest_path: str
+    _entries: dict[str, ManifestEntry]
+    _dirty: bool
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self._entries = self.load()
+        self._dirty = False
+
+    def load(self) -> dict[str, ManifestEntry]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as manifest_file:
+                stored = json.load(manifest_file)
+            if stored.get("version") != MANIFEST_VERSION:
+                return {}
+            return {output_path: ManifestEntry(*entry) for output_path, entry in stored["entries"].items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as error:
+            helper.log(f"Ignoring unreadable export manifest {self.manifest_path}: {error}", 'warning')
+            return {}
+
+    def unchanged_hash(self, output_path: str) -> Optional[str]:
+        """ Hash last written to output_path, None when the file is missing or was changed since """
+        output_path = os.path.abspath(output_path)
+        entry = self._entries.get(output_path)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(output_path)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (entry.size, entry.mtime_ns):
+            return None
+        return entry.sha256
+
+    def record(self, output_path: str, parser: str, source: str, sha256: str) -> None:
+        """ Remember the content just written to output_path, exported by parser from source """
+        output_path = os.path.abspath(output_path)
+        stat = os.stat(output_path)
+        self._entries[output_path] = ManifestEntry(parser, normalize_source(source), sha256, stat.st_size,
+                                                   stat.st_mtime_ns)
+        self._dirty = True
+
+    def remove_stale(self, directory: str, parser: str, source: str, current: Iterable[str]) -> int:
+        """
+        Delete the files exported into directory from the same parser and source that are not in current
+
+        Diagrams of other profiles exported into the same directory are left alone. Returns the count deleted.
+        """
+        directory = os.path.abspath(directory)
+        source = normalize_source(source)
+        current = {os.path.abspath(output_path) for output_path in current}
+        removed = 0
+        for output_path, entry in list(self._entries.items()):
+            if entry.parser != parser or entry.source != source or os.path.dirname(output_path) != directory \
+                    or output_path in current:
+                continue
+            if self.unchanged_hash(output_path) is not None:
+                os.remove(output_path)
+                removed += 1
+            del self._entries[output_path]
+            self._dirty = True
+        return removed
+
+    def prune(self) -> None:
+        """ Forget the entries of output directories that were deleted """
+        existing: dict[str, bool] = {}
+        for output_path in list(self._entries):
+            directory = os.path.dirname(output_path)
+            if directory not in existing:
+                existing[directory] = os.path.isdir(directory)
+            if not existing[directory]:
+                del self._entries[output_path]
+                self._dirty = True
+
+    def save(self) -> None:
+        self.prune()
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        temporary_path = self.manifest_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as manifest_file:
+            json.dump({"version": MANIFEST_VERSION,
+                       "entries": {output_path: list(entry) for output_path, entry in self._entries.items()}},
+                      manifest_file)
+        os.replace(temporary_path, self.manifest_path)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,112 @@
+"""Moves the draw.io editing payload out of templates into an archive, and back for editing"""
+import json
+import os
+import re
+import zipfile
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+from classes.template_engine import write_template_index
+
+ARCHIVE_NAME = "drawio_sources.zip"
+ROOT_TAG_PATTERN = re.compile(r"<svg\b[^>]*>")
+# draw.io keeps the editable diagram in the content attribute of the root svg element
+CONTENT_ATTRIBUTE_PATTERN = re.compile(r'\scontent="[^"]*"')
+
+
+class DrawioContent(NamedTuple):
+    offset: int  # position of the attribute in the root svg start tag
+    attribute: str  # the removed text, leading whitespace included
+
+
+def split_drawio_content(source: str) -> tuple[str, Optional[DrawioContent]]:
+    """ The template without its draw.io content attribute and the removed attribute, None when it has none """
+    root_tag = ROOT_TAG_PATTERN.search(source)
+    if root_tag is None:
+        return source, None
+    attribute = CONTENT_ATTRIBUTE_PATTERN.search(root_tag.group(0))
+    if attribute is None:
+        return source, None
+    start = root_tag.start() + attribute.start()
+    end = root_tag.start() + attribute.end()
+    return source[:start] + source[end:], DrawioContent(attribute.start(), attribute.group(0))
+
+
+def join_drawio_content(source: str, content: DrawioContent) -> str:
+    """ Put a removed content attribute back, at its old position when the start tag still allows it """
+    root_tag = ROOT_TAG_PATTERN.search(source)
+    if root_tag is None:
+        raise ValueError("Template has no svg element")
+    tag = root_tag.group(0)
+    offset = content.offset
+    if offset > len(tag) - 1 or not (tag[offset].isspace() or tag[offset] in "/>"):
+        offset = len("<svg")
+    position = root_tag.start() + offset
+    return source[:position] + content.attribute + source[position:]
+
+
+def read_archive(archive_path: Union[str, Path]) -> dict[str, DrawioContent]:
+    """ Removed attributes by template path (relative to the templates directory, / separated) """
+    if not os.path.exists(archive_path):
+        return {}
+    entries = {}
+    with zipfile.ZipFile(archive_path) as archive:
+        for name in archive.namelist():
+            entries[name] = DrawioContent(**json.loads(archive.read(name)))
+    return entries
+
+
+def write_archive(archive_path: Union[str, Path], entries: dict[str, DrawioContent]) -> None:
+    if not entries:
+        if os.path.exists(archive_path):
+            os.remove(archive_path)
+        return
+    temporary_path = str(archive_path) + ".tmp"
+    with zipfile.ZipFile(temporary_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in sorted(entries.items()):
+            archive.writestr(name, json.dumps(content._asdict()))
+    os.replace(temporary_path, archive_path)
+
+
+def template_files(templates_directory: Union[str, Path]) -> list[tuple[str, Path]]:
+    directory = Path(templates_directory)
+    return sorted((template.relative_to(directory).as_posix(), template) for template in directory.rglob("*.svg"))
+
+
+def compact_templates(templates_directory: Union[str, Path], archive_path: Union[str, Path, None] = None) -> list[str]:
+    """ Move the content attribute of every template into the archive, returns the compacted templates """
+    archive_path = archive_path or os.path.join(templates_directory, ARCHIVE_NAME)
+    entries = read_archive(archive_path)
+    slim_templates = []
+    for name, template in template_files(templates_directory):
+        slim, content = split_drawio_content(template.read_bytes().decode("utf-8"))
+        if content is None:
+            continue
+        entries[name] = content
+        slim_templates.append((name, template, slim))
+    if not slim_templates:
+        return []
+    # Archive first and once, so a failure never leaves a template without its payload stored anywhere
+    write_archive(archive_path, entries)
+    for name, template, slim in slim_templates:
+        template.write_bytes(slim.encode("utf-8"))
+        write_template_index(template)
+    return [name for name, template, slim in slim_templates]
+
+
+def restore_templates(templates_directory: Union[str, Path], archive_path: Union[str, Path, None] = None) -> list[str]:
+    """ Put archived content attributes back into their templates, returns the restored templates """
+    archive_path = archive_path or os.path.join(templates_directory, ARCHIVE_NAME)
+    entries = read_archive(archive_path)
+    restored = []
+    for name, template in template_files(templates_directory):
+        if name not in entries:
+            continue
+        source = template.read_bytes().decode("utf-8")
+        if split_drawio_content(source)[1] is None:
+            template.write_bytes(join_drawio_content(source, entries[name]).encode("utf-8"))
+            write_template_index(template)
+            restored.append(name)
+        del entries[name]
+    write_archive(archive_path, entries)
+    return restored
@@ -0,0 +1,256 @@
+"""Single pass substitution engine for SVG diagram templates"""
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, NamedTuple, Optional, Tuple, Union
+
+# Buttons are matched case insensitively, the brand placeholder is not (matches the historic re.sub behaviour)
+PLACEHOLDER_PATTERN = re.compile(r"\b(?:(?P<button>(?i:BUTTON_\d+))|(?P<brand>TEMPLATE_NAME))\b")
+BUTTON_KEY_PATTERN = re.compile(r"BUTTON_\d+", flags=re.IGNORECASE)
+BRAND_PLACEHOLDER = "TEMPLATE_NAME"
+# ids stamped by sync_ids.py: {name}_div, {name}_text and {name}_rect
+ELEMENT_ID_PATTERN = re.compile(r'\sid="(?P<id>(?P<name>[^"]+)_(?P<part>div|text|rect))"')
+INDEX_VERSION = 2
+INDEX_SUFFIX = ".index.json"
+
+
+class Placeholder(NamedTuple):
+    text: str
+    key: str
+    start: int
+    end: int
+
+
+def scan_placeholders(source: str) -> list[Placeholder]:
+    placeholders = []
+    for match in PLACEHOLDER_PATTERN.finditer(source):
+        text = match.group(0)
+        key = text.upper() if match.group('button') else BRAND_PLACEHOLDER
+        placeholders.append(Placeholder(text, key, match.start(), match.end()))
+    return placeholders
+
+
+def decode_template(data: bytes) -> str:
+    """ Template text as read_text gives it (utf-8, universal newlines), the text index offsets refer to """
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+class TemplateIndex(NamedTuple):
+    """
+    Placeholders and element ids of a template, stored next to it as <template>.index.json by sync_ids.py
+
+    Offsets are character offsets into decode_template(data), the index only applies to the file whose
+    sha256 it records.
+    """
+    sha256: str
+    placeholders: list[Placeholder]
+    # placeholder name -> {'div' | 'text' | 'rect': element id}
+    elements: dict[str, dict[str, str]]
+    # element id -> child positions from the root element down to it, in the lxml tree of the template
+    paths: dict[str, list[int]]
+
+    @classmethod
+    def build(cls, data: bytes) -> 'TemplateIndex':
+        source = decode_template(data)
+        elements: dict[str, dict[str, str]] = {}
+        for match in ELEMENT_ID_PATTERN.finditer(source):
+            elements.setdefault(html.unescape(match.group('name')), {})[match.group('part')] = \
+                html.unescape(match.group('id'))
+        element_ids = {element_id for parts in elements.values() for element_id in parts.values()}
+        return cls(hashlib.sha256(data).hexdigest(), scan_placeholders(source), elements,
+                   element_paths(data, element_ids))
+
+    def to_json(self) -> dict:
+        return {
+            'version': INDEX_VERSION,
+            'sha256': self.sha256,
+            'placeholders': [list(placeholder) for placeholder in self.placeholders],
+            'elements': self.elements,
+            'paths': self.paths,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'TemplateIndex':
+        return cls(data['sha256'], [Placeholder(*placeholder) for placeholder in data['placeholders']],
+                   data['elements'], data['paths'])
+
+
+def element_paths(data: bytes, element_ids: set[str]) -> dict[str, list[int]]:
+    """ Child positions leading to each element with one of the ids, empty when data is not well formed xml """
+    # Only needed when indexes are written, the export never imports lxml for it
+    from lxml import etree
+    try:
+        root = etree.fromstring(data)
+    except etree.XMLSyntaxError:
+        return {}
+    paths = {}
+    for element in root.iter():
+        element_id = element.get('id')
+        if element_id not in element_ids:
+            continue
+        path = []
+        node = element
+        while node is not root:
+            parent = node.getparent()
+            path.append(parent.index(node))
+            node = parent
+        paths[element_id] = path[::-1]
+    return paths
+
+
+def template_index_path(template_path: Union[str, Path]) -> str:
+    return os.path.splitext(str(template_path))[0] + INDEX_SUFFIX
+
+
+def write_template_index(template_path: Union[str, Path]) -> TemplateIndex:
+    index = TemplateIndex.build(Path(template_path).read_bytes())
+    with open(template_index_path(template_path), "w", encoding="utf-8") as index_file:
+        json.dump(index.to_json(), index_file, separators=(",", ":"))
+        index_file.write("\n")
+    return index
+
+
+def load_template_index(template_path: Union[str, Path], data: bytes) -> Optional[TemplateIndex]:
+    """ The index stored for the template, None when there is none or it was built for other content """
+    try:
+        with open(template_index_path(template_path), encoding="utf-8") as index_file:
+            stored = json.load(index_file)
+        if stored.get('version') != INDEX_VERSION or stored.get('sha256') != hashlib.sha256(data).hexdigest():
+            return None
+        return TemplateIndex.from_json(stored)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class CompiledTemplate:
+    """
+    A template split once into literal chunks and placeholder slots
+
+    Rendering joins the chunks with the looked up value for each slot, so a (device, mode)
+    export costs one pass over the slots instead of one regex pass over the document per button.
+    """
+    source: str
+    chunks: list[str]
+    placeholders: list[Placeholder]
+
+    def __init__(self, source: str, placeholders: Optional[list[Placeholder]] = None):
+        """ placeholders: slots from a template index, the source is scanned for them when None """
+        self.source = source
+        self.chunks = []
+        self.placeholders = scan_placeholders(source) if placeholders is None else placeholders
+        position = 0
+        for placeholder in self.placeholders:
+            self.chunks.append(source[position:placeholder.start])
+            position = placeholder.end
+        self.chunks.append(source[position:])
+
+    def render(self, items: Iterable[Tuple[str, Any]], no_bind_text: str, fill_unbound: bool = True,
+               title: Optional[str] = None) -> str:
+        """ Fill the template in a single join, see render_parts """
+        return ''.join(self.render_parts(items, no_bind_text, fill_unbound, title))
+
+    def render_parts(self, items: Iterable[Tuple[str, Any]], no_bind_text: str, fill_unbound: bool = True,
+                     title: Optional[str] = None) -> list[str]:
+        """
+        The filled template as a list of strings, so writers can stream it without joining
+
+        items: (button, description) pairs, a description of "NO BIND" is rendered as no_bind_text
+        fill_unbound: replace buttons without an item with no_bind_text, otherwise leave them untouched
+        title: replaces TEMPLATE_NAME, left untouched when None
+        """
+        lookup = {}
+        irregular = []
+        for button, description in items:
+            if description == "NO BIND":
+                description = no_bind_text
+            value = html.escape(str(description))
+            if BUTTON_KEY_PATTERN.fullmatch(button):
+                lookup.setdefault(button.upper(), value)
+            else:
+                irregular.append((button, value))
+        unbound_text = html.escape(no_bind_text) if fill_unbound else None
+
+        parts = []
+        append = parts.append
+        for chunk, placeholder in zip(self.chunks, self.placeholders):
+            append(chunk)
+            if placeholder.key == BRAND_PLACEHOLDER:
+                append(placeholder.text if title is None else title)
+                continue
+            value = lookup.get(placeholder.key, unbound_text)
+            append(placeholder.text if value is None else value)
+        append(self.chunks[-1])
+        if not irregular:
+            return parts
+
+        # Keys that are not BUTTON_N never land in a slot, fall back to the old word boundary replacement
+        rendered = ''.join(parts)
+        for button, value in irregular:
+            rendered = re.sub("\\b" + re.escape(button) + "\\b", lambda _, v=value: v, rendered, flags=re.IGNORECASE)
+        return [rendered]
+
+
+class TemplateCache:
+    """
+    LRU cache of compiled templates keyed by path
+
+    An entry is only reused while the file's mtime and size still match, so edited templates
+    are picked up on the next export without restarting the application.
+    Placeholders come from the template's index when it matches the file, otherwise the file is scanned.
+    """
+    max_entries: int
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[Tuple[int, int], CompiledTemplate]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, template_path: Union[str, Path]) -> Optional[CompiledTemplate]:
+        """ Compiled template for the path, None when the file does not exist or cannot be read """
+        template_path = os.path.normpath(template_path)
+        try:
+            stat = os.stat(template_path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(template_path)
+            if entry and entry[0] == signature:
+                self._entries.move_to_end(template_path)
+                return entry[1]
+
+        try:
+            data = Path(template_path).read_bytes()
+        except OSError:
+            # Removed or unreadable since the stat
+            return None
+        index = load_template_index(template_path, data)
+        compiled = CompiledTemplate(decode_template(data), None if index is None else index.placeholders)
+        with self._lock:
+            self._entries[template_path] = (signature, compiled)
+            self._entries.move_to_end(template_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def reserve(self, entries: int) -> None:
+        """ Keep room for at least entries templates, the cache never shrinks """
+        with self._lock:
+            self.max_entries = max(self.max_entries, entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by every Export in the process so repeated exports only pay the parse cost once
+template_cache = TemplateCache()
@@ -1,20 +1,24 @@
 from pathlib import Path
-from typing import Union, Dict
+from typing import Dict, Iterable, Optional, Union
 from lxml import etree
 
+from classes.template_engine import TemplateIndex, load_template_index
+
 Bindings = Dict[str, str]
 
 
-# TODO: templater should use xml id attributes
 class Templater:
     _device_template_path: str
     _tree: etree.ElementTree
     _no_bind_text: str
     _brand_template: str
+    _index: Optional[TemplateIndex]
 
     def __init__(self, device_template_path: Union[str, Path], no_bind_text="Unbound", brand_template: str = ''):
         self._device_template_path = str(device_template_path)
-        self._tree = etree.parse(str(device_template_path))
+        data = Path(device_template_path).read_bytes()
+        self._tree = etree.ElementTree(etree.fromstring(data))
+        self._index = load_template_index(device_template_path, data)
         self._no_bind_text = no_bind_text
         # TODO: should be parameterized and use the id of the button itself
         self._element_finder = etree.XPath(
@@ -27,6 +31,9 @@ class Templater:
         self._brand_template = brand_template
 
     def replace_with_bindings(self, items: Bindings) -> None:
+        if self._index is not None and self._index.elements:
+            self.replace_indexed_elements(items)
+            return
         elements = self._element_finder(self._tree)
         for element in elements:
             element_name = element.text.strip()
@@ -39,5 +46,65 @@ class Templater:
             text_element = element.getparent().getparent().getparent().getnext()
             text_element.text = items.get(element_name, self._no_bind_text)
 
+    def get_tree(self) -> etree.ElementTree:
+        return self._tree
+
+    def get_elements(self, part: str) -> dict[str, etree.ElementBase]:
+        """ Name -> element carrying the {name}_{part} id (see sync_ids.py), from the template index if any """
+        if self._index is not None and self._index.elements:
+            names = {parts[part]: name for name, parts in self._index.elements.items() if part in parts}
+            elements = self.resolve_indexed_ids(names)
+            if elements is not None:
+                return {names[element_id]: element for element_id, element in elements.items()}
+        suffix = '_' + part
+        return {element_id[:-len(suffix)]: element for element_id, element in self.scan_ids().items()
+                if element_id.endswith(suffix)}
+
     def get_template_as_bytes(self) -> bytes:
         return etree.tostring(self._tree)
+
+    def resolve_indexed_ids(self, element_ids: Iterable[str]) -> Optional[dict[str, etree.ElementBase]]:
+        """ Elements found by following the index paths, None when an id cannot be resolved that way """
+        root = self._tree.getroot()
+        paths = self._index.paths
+        elements = {}
+        for element_id in element_ids:
+            path = paths.get(element_id)
+            if path is None:
+                return None
+            element = root
+            try:
+                for position in path:
+                    element = element[position]
+            except IndexError:
+                return None
+            if element.get('id') != element_id:
+                return None
+            elements[element_id] = element
+        return elements
+
+    def scan_ids(self) -> dict[str, etree.ElementBase]:
+        """ id -> element of every element with an id, for templates without a usable index """
+        return {element.get('id'): element for element in self._tree.getroot().iterfind('.//*[@id]')}
+
+    def replace_indexed_elements(self, items: Bindings) -> None:
+        """ Fill the {name}_div and {name}_text elements listed in the template index """
+        slots = {}
+        for name, parts in self._index.elements.items():
+            if name in ['Created by Joystick Diagrams', 'JOYSTICK NAME']:
+                continue
+            for part in ('div', 'text'):
+                if part in parts:
+                    slots[parts[part]] = (name, part)
+        elements = self.resolve_indexed_ids(slots)
+        if elements is None:
+            elements = self.scan_ids()
+        for element_id, (name, part) in slots.items():
+            element = elements.get(element_id)
+            if element is None:
+                continue
+            if name == "TEMPLATE_NAME":
+                if part == 'div':
+                    element.text = self._device_template_path
+                continue
+            element.text = items.get(name, self._no_bind_text)
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import functools
 import os
+import threading
+from array import array
 from pathlib import Path
 
 import typing
 from dataclasses import dataclass, field
-from io import BytesIO
 
 from lxml import etree
 
@@ -14,18 +16,111 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtSvg import QSvgWidget
 from PyQt5.QtWidgets import QScrollArea, QSplitter
 
+import config
 from classes.templater import Templater
 from functions.helper import log
 
 
-@dataclass
+@functools.lru_cache(maxsize=None)
+def input_names(kind: str, count: int) -> tuple[str, ...]:
+    """ Key names of a device's inputs (Button_1 ... Button_count), shared by devices with as many inputs """
+    return tuple(f"{kind}_{number}" for number in range(1, count + 1))
+
+
+class DeviceLayout:
+    """ Input names of a device and the position of each name, one instance per input counts (see device_layout) """
+    __slots__ = ('buttons', 'axes', 'hats', 'positions')
+
+    def __init__(self, buttons: int, axes: int, hats: int):
+        self.buttons = input_names("Button", buttons)
+        self.axes = input_names("Axis", axes)
+        self.hats = input_names("Hat", hats)
+        self.positions = {name: (kind, index)
+                          for kind, names in (('buttons', self.buttons), ('axes', self.axes), ('hats', self.hats))
+                          for index, name in enumerate(names)}
+
+
+@functools.lru_cache(maxsize=None)
+def device_layout(buttons: int, axes: int, hats: int) -> DeviceLayout:
+    return DeviceLayout(buttons, axes, hats)
+
+
 class DeviceState:
-    deviceId: str
-    deviceName: str
-    guid: typing.Optional[str] = None
-    buttons: dict[str, bool] = field(default_factory=dict)
-    axes: dict[str, float] = field(default_factory=dict)
-    hats: dict[str, tuple[float, float]] = field(default_factory=dict)
+    """
+    Input values of one device, stored by input number
+
+    buttons is a bytearray of 0/1, axes an array('f') and hats an array('b') of x, y pairs. The names come from
+    the layout, shared by all devices with the same input counts. The set_ methods return whether the value changed.
+    """
+    __slots__ = ('deviceId', 'deviceName', 'guid', 'layout', 'buttons', 'axes', 'hats')
+
+    def __init__(self, deviceId: str, deviceName: str, guid: typing.Optional[str] = None,
+                 layout: typing.Optional[DeviceLayout] = None):
+        self.deviceId = deviceId
+        self.deviceName = deviceName
+        self.guid = guid
+        self.layout = layout if layout is not None else device_layout(0, 0, 0)
+        self.buttons = bytearray(len(self.layout.buttons))
+        self.axes = array('f', [0.0]) * len(self.layout.axes)
+        self.hats = array('b', [0, 0]) * len(self.layout.hats)
+
+    def set_button(self, index: int, pressed: bool) -> bool:
+        if self.buttons[index] == pressed:
+            return False
+        self.buttons[index] = pressed
+        return True
+
+    def set_axis(self, index: int, value: float) -> bool:
+        previous = self.axes[index]
+        self.axes[index] = value
+        # Compared once stored, a value only differing beyond float precision is no change
+        return self.axes[index] != previous
+
+    def set_hat(self, index: int, value: tuple[int, int]) -> bool:
+        if self.get_hat(index) == tuple(value):
+            return False
+        self.hats[2 * index], self.hats[2 * index + 1] = value
+        return True
+
+    def get_hat(self, index: int) -> tuple[int, int]:
+        return self.hats[2 * index], self.hats[2 * index + 1]
+
+    def button_items(self) -> typing.Iterator[tuple[str, bool]]:
+        return zip(self.layout.buttons, map(bool, self.buttons))
+
+    def axis_items(self) -> typing.Iterator[tuple[str, float]]:
+        return zip(self.layout.axes, self.axes)
+
+    def hat_items(self) -> typing.Iterator[tuple[str, tuple[int, int]]]:
+        return ((name, self.get_hat(index)) for index, name in enumerate(self.layout.hats))
+
+    def pressed_buttons(self) -> set[str]:
+        names = self.layout.buttons
+        return {names[index] for index, pressed in enumerate(self.buttons) if pressed}
+
+    def get_input(self, name: str) -> typing.Any:
+        position = self.layout.positions.get(name)
+        if position is None:
+            return None
+        kind, index = position
+        if kind == 'buttons':
+            return bool(self.buttons[index])
+        if kind == 'axes':
+            return self.axes[index]
+        return self.get_hat(index)
+
+
+# Device id -> names of the inputs that changed, None when the device was connected or disconnected
+DeviceChanges = dict[str, typing.Optional[set[str]]]
+
+
+def merge_changes(changes: DeviceChanges, more: DeviceChanges) -> None:
+    for device_id, names in more.items():
+        current = changes.setdefault(device_id, set())
+        if names is None:
+            changes[device_id] = None
+        elif current is not None:
+            current.update(names)
 
 
 @dataclass
@@ -69,6 +164,12 @@ class TreeItem:
     def parent_item(self) -> TreeItem:
         return self._parent_item
 
+    def set_data(self, column: int, value: typing.Any) -> None:
+        self._item_data[column] = QtCore.QVariant(value)
+
+    def remove_child(self, row: int) -> None:
+        del self._child_items[row]
+
 
 class TreeModel(QtCore.QAbstractItemModel):
     _root_item: typing.Optional[TreeItem]
@@ -155,160 +256,208 @@ class TreeModel(QtCore.QAbstractItemModel):
 
 
 class DeviceModel(TreeModel):
+    _device_items: dict[str, TreeItem]
+    _input_items: dict[str, dict[str, TreeItem]]
+
     def __init__(self, parent: typing.Optional[QtCore.QObject] = None):
         super().__init__(parent)
-
-    def signal_state(self, deviceState: DeviceState):
-        existing_item: typing.Optional[TreeItem] = None
-        root_item = self._root_item
-        for i in range(root_item.child_count()):
-            existing_item = root_item.child(i)
-        if not existing_item:
+        self._device_items = {}
+        self._input_items = {}
+
+    def signal_state(self, deviceState: DeviceState, changed: typing.Optional[set[str]] = None) -> bool:
+        """ Add the device or update its inputs, all of them or only those in changed, returns whether it was added """
+        device_item = self._device_items.get(deviceState.deviceId)
+        if device_item is None:
+            root_item = self._root_item
             self.beginInsertRows(QtCore.QModelIndex(), self.rowCount(), self.rowCount())
             device_item = TreeItem(
                 [QtCore.QVariant(deviceState.deviceId), QtCore.QVariant(deviceState.deviceName)],
                 root_item
             )
-            self._produce_device_items(device_item, deviceState)
+            self._input_items[deviceState.deviceId] = self._produce_device_items(device_item, deviceState)
             root_item.append_child(device_item)
+            self._device_items[deviceState.deviceId] = device_item
             self.endInsertRows()
-        else:
-            self._update_device_items(existing_item, deviceState)
+            return True
+        self._update_device_items(deviceState, changed)
+        return False
+
+    def remove_device(self, device_id: str) -> None:
+        device_item = self._device_items.pop(device_id, None)
+        if device_item is None:
+            return
+        del self._input_items[device_id]
+        row = device_item.row()
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        self._root_item.remove_child(row)
+        self.endRemoveRows()
 
     @staticmethod
-    def _produce_device_items(device_item: TreeItem, deviceState: DeviceState):
+    def _produce_device_items(device_item: TreeItem, deviceState: DeviceState) -> dict[str, TreeItem]:
+        input_items = {}
         device_item.append_child(
             TreeItem([QtCore.QVariant("Joystick name"), QtCore.QVariant(deviceState.deviceName)], device_item),
         )
         device_item.append_child(
             TreeItem([QtCore.QVariant("GUID"), QtCore.QVariant(deviceState.guid)], device_item)
         )
-        axes_item = TreeItem([QtCore.QVariant("Number of axes"), QtCore.QVariant(len(deviceState.axes))], device_item)
-        for key, value in deviceState.axes.items():
-            axes_item.append_child(TreeItem([QtCore.QVariant(key), QtCore.QVariant(value)], axes_item))
-        device_item.append_child(axes_item)
-
-        button_item = TreeItem([QtCore.QVariant("Number of buttons"), QtCore.QVariant(len(deviceState.buttons))],
-                               device_item)
-        for key, value in deviceState.buttons.items():
-            button_item.append_child(TreeItem([QtCore.QVariant(key), QtCore.QVariant(value)], button_item))
-        device_item.append_child(button_item)
-        hats_item = TreeItem([QtCore.QVariant("Number of hats"), QtCore.QVariant(len(deviceState.hats))], device_item)
-        for key, value in deviceState.hats.items():
-            hats_item.append_child(TreeItem([QtCore.QVariant(key), QtCore.QVariant(value)], hats_item))
-        device_item.append_child(hats_item)
-
-    @staticmethod
-    def _update_device_items(device_item: TreeItem, deviceState: DeviceState):
-        axes_item = device_item.child(2)
-        for index, key in enumerate(deviceState.axes):
-            data = axes_item.child(index).data(1)
-            data.swap(QtCore.QVariant(deviceState.axes[key]))
-
-        button_item = device_item.child(3)
-        for index, key in enumerate(deviceState.buttons):
-            data = button_item.child(index).data(1)
-            data.swap(QtCore.QVariant(deviceState.buttons[key]))
+        for title, items in (("Number of axes", list(deviceState.axis_items())),
+                             ("Number of buttons", list(deviceState.button_items())),
+                             ("Number of hats", list(deviceState.hat_items()))):
+            inputs_item = TreeItem([QtCore.QVariant(title), QtCore.QVariant(len(items))], device_item)
+            for key, value in items:
+                input_items[key] = TreeItem([QtCore.QVariant(key), QtCore.QVariant(value)], inputs_item)
+                inputs_item.append_child(input_items[key])
+            device_item.append_child(inputs_item)
+        return input_items
+
+    def _update_device_items(self, deviceState: DeviceState, changed: typing.Optional[set[str]]):
+        input_items = self._input_items[deviceState.deviceId]
+        for key in (input_items if changed is None else changed):
+            item = input_items.get(key)
+            if item is None:
+                continue
+            item.set_data(1, deviceState.get_input(key))
+            index = self.createIndex(item.row(), 1, item)
+            self.dataChanged.emit(index, index)
+
+
+class DeviceManager:
+    """
+    Joystick state kept up to date from pygame events
+
+    Joysticks are opened once when added and closed when removed, button, axis and hat events only update the
+    input they are about. Nothing is polled, a device without input events costs nothing.
+    """
+    device_state: dict[str, DeviceState]
+    _joysticks: dict[int, pygame.joystick.JoystickType]
+    _device_ids: dict[int, str]
+
+    def __init__(self, device_state: dict[str, DeviceState]):
+        self.device_state = device_state
+        self._joysticks = {}
+        self._device_ids = {}
+
+    def handle_events(self, events: typing.Iterable[pygame.event.Event]) -> DeviceChanges:
+        """ Apply the events, returns the devices added or removed and the inputs whose value changed """
+        changes = {}
+        for event in events:
+            change = self.handle_event(event)
+            if change is not None:
+                device_id, name = change
+                merge_changes(changes, {device_id: None if name is None else {name}})
+        return changes
+
+    def handle_event(self, event: pygame.event.Event) -> typing.Optional[tuple[str, typing.Optional[str]]]:
+        """ (device id, input name) of the input the event changed, the name is None when a device came or went """
+        if event.type == pygame.JOYDEVICEADDED:
+            device_id = self.open_device(pygame.joystick.Joystick(event.device_index))
+            return None if device_id is None else (device_id, None)
+        if event.type == pygame.JOYDEVICEREMOVED:
+            device_id = self.close_device(event.instance_id)
+            return None if device_id is None else (device_id, None)
+        if event.type not in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYAXISMOTION, pygame.JOYHATMOTION):
+            return None
+        device_id = self._device_ids.get(event.instance_id)
+        if device_id is None:
+            return None
+        device_state = self.device_state[device_id]
+        layout = device_state.layout
+        if event.type == pygame.JOYAXISMOTION:
+            changed, name = device_state.set_axis(event.axis, event.value), layout.axes[event.axis]
+        elif event.type == pygame.JOYHATMOTION:
+            changed, name = device_state.set_hat(event.hat, event.value), layout.hats[event.hat]
+        else:
+            changed = device_state.set_button(event.button, event.type == pygame.JOYBUTTONDOWN)
+            name = layout.buttons[event.button]
+        return (device_id, name) if changed else None
+
+    def open_device(self, joystick: pygame.joystick.JoystickType) -> typing.Optional[str]:
+        joystick.init()
+        instance_id = joystick.get_instance_id()
+        if instance_id in self._joysticks:
+            return None
+        device_id = f"Joystick {instance_id}"
+        layout = device_layout(joystick.get_numbuttons(), joystick.get_numaxes(), joystick.get_numhats())
+        device_state = DeviceState(device_id, joystick.get_name(), joystick.get_guid(), layout)
+        # The only full read of the device, events keep the state current from here on
+        for index in range(len(layout.buttons)):
+            device_state.set_button(index, joystick.get_button(index))
+        for index in range(len(layout.axes)):
+            device_state.set_axis(index, joystick.get_axis(index))
+        for index in range(len(layout.hats)):
+            device_state.set_hat(index, joystick.get_hat(index))
+        self.device_state[device_id] = device_state
+        self._joysticks[instance_id] = joystick
+        self._device_ids[instance_id] = device_id
+        log(f"opened {device_id}: {joystick.get_name()}")
+        return device_id
+
+    def close_device(self, instance_id: int) -> typing.Optional[str]:
+        joystick = self._joysticks.pop(instance_id, None)
+        if joystick is None:
+            return None
+        joystick.quit()
+        device_id = self._device_ids.pop(instance_id)
+        self.device_state.pop(device_id, None)
+        log(f"closed {device_id}")
+        return device_id
 
-        hats_item = device_item.child(4)
-        for index, key in enumerate(deviceState.hats):
-            data = hats_item.child(index).data(1)
-            data.swap(QtCore.QVariant(deviceState.hats[key]))
+    def close(self) -> None:
+        for instance_id in list(self._joysticks):
+            self.close_device(instance_id)
 
 
 @dataclass
 class RenderThread(QtCore.QThread):
+    """
+    Reads joystick events and reports what changed through changes_ready
+
+    Changes of consecutive frames are merged until the UI takes them (see take_changes), so at most one
+    changes_ready is queued at a time and a frame without changes emits nothing.
+    """
+    changes_ready = QtCore.pyqtSignal()
     _deviceState: dict[str, DeviceState]
-    _refresher: lambda: None
+    _devices: DeviceManager
+    _pending: DeviceChanges
+    _pending_lock: threading.Lock
 
-    def __init__(self, deviceState: dict[str, DeviceState], refresher: lambda: None):
+    def __init__(self, deviceState: dict[str, DeviceState]):
         QtCore.QThread.__init__(self)
         self._deviceState = deviceState
-        self._refresher = refresher
+        self._devices = DeviceManager(deviceState)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
 
+        # Connected joysticks are reported as JOYDEVICEADDED events once the joystick module is initialised
         pygame.joystick.init()
 
     def run(self):
         clock = pygame.time.Clock()
         while not self.isInterruptionRequested():
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    # TODO: do something with these events
-                    # log("Quit pressed")
-                    pass
-                elif event.type == pygame.JOYBUTTONDOWN:
-                    # TODO: do something with these events
-                    # log("Joystick button pressed.")
-                    pass
-                elif event.type == pygame.JOYBUTTONUP:
-                    # TODO: do something with these events
-                    # log("Joystick button released.")
-                    pass
-
-            joystick_count = pygame.joystick.get_count()
-
-            for i in range(joystick_count):
-                joystick = pygame.joystick.Joystick(i)
-                joystick.init()
-
-                try:
-                    jid = joystick.get_instance_id()
-                except AttributeError:
-                    # get_instance_id() is an SDL2 method
-                    jid = joystick.get_id()
-                device_id = f"Joystick {jid}"
-
-                # Get the name from the OS for the controller/joystick.
-                name = joystick.get_name()
-
-                if jid not in self._deviceState:
-                    self._deviceState[device_id] = DeviceState(device_id, name)
-
-                device_state = self._deviceState[device_id]
-
-                try:
-                    guid = joystick.get_guid()
-                except AttributeError:
-                    # get_guid() is an SDL2 method
-                    pass
-                else:
-                    device_state.guid = guid
-
-                # Usually axis run in pairs, up/down for one, and left/right for the other.
-                axes = joystick.get_numaxes()
-
-                for j in range(axes):
-                    axis = joystick.get_axis(j)
-                    device_state.axes[f"Axis_{j + 1}"] = axis
-
-                buttons = joystick.get_numbuttons()
-
-                for j in range(buttons):
-                    button = joystick.get_button(j)
-                    device_state.buttons[f"Button_{j + 1}"] = button
-
-                hats = joystick.get_numhats()
-
-                # Hat position. All or nothing for direction, not a float like get_axis(). Position is a tuple of int
-                # values (x, y).
-                for j in range(hats):
-                    hat = joystick.get_hat(j)
-                    device_state.hats[f"Hat_{j + 1}"] = hat
-
-            #
-            # ALL CODE TO DRAW SHOULD GO ABOVE THIS COMMENT
-            #
-
-            # Limit to 20 frames per second.
-            clock.tick(20)
-            log(f"render {clock}")
-            self._refresher()
+            changes = self._devices.handle_events(pygame.event.get())
+            if changes:
+                with self._pending_lock:
+                    notify = not self._pending
+                    merge_changes(self._pending, changes)
+                if notify:
+                    self.changes_ready.emit()
+
+            # Frames per second, see PollRate in config.cfg. tick sleeps instead of spinning, about 1 ms resolution
+            clock.tick(config.visualizer_poll_rate)
+        self._devices.close()
+
+    def take_changes(self) -> DeviceChanges:
+        """ Everything changed since the last call, for the UI thread """
+        with self._pending_lock:
+            changes, self._pending = self._pending, {}
+        return changes
 
 
 @dataclass
 class DebugDisplayImageWidget(QtWidgets.QTreeView):
     deviceState: dict[str, DeviceState]
-    refresher: lambda: None
+    refresher: typing.Callable[[DeviceChanges], None]
     parent: typing.Optional['QtWidgets.QWidget'] = None
     renderThread: RenderThread = field(init=False)
 
@@ -316,21 +465,72 @@ class DebugDisplayImageWidget(QtWidgets.QTreeView):
         super().__init__(self.parent)
         self.setMinimumSize(400, 700)
         self.setModel(DeviceModel())
-        self.renderThread = RenderThread(self.deviceState, self.refresh)
+        self.renderThread = RenderThread(self.deviceState)
+        self.renderThread.changes_ready.connect(self.refresh, QtCore.Qt.QueuedConnection)
         self.renderThread.start()
         self.expandAll()
 
     def refresh(self):
+        changes = self.renderThread.take_changes()
+        if not changes:
+            return
         model = typing.cast(DeviceModel, self.model())
-
-        # TODO: is this the right thing todo? maybe better let the tread write directly to this?
-        for _, device_state in self.deviceState.items():
-            model.signal_state(device_state)
-
-        # TODO: temporary expansion
-        self.expandAll()
-        self.resizeColumnToContents(0)
-        self.refresher()
+        added = False
+        for device_id, names in changes.items():
+            device_state = self.deviceState.get(device_id)
+            if device_state is None:
+                model.remove_device(device_id)
+            else:
+                added = model.signal_state(device_state, names) or added
+
+        if added:
+            self.expandAll()
+            self.resizeColumnToContents(0)
+        self.refresher(changes)
+
+
+class DeviceTemplate:
+    """
+    Parsed template of one device for the live view
+
+    The tree is parsed once and highlighted in place, each frame only the fills of buttons whose pressed state
+    changed are touched and the svg is only serialised again when something changed.
+    rects maps button names to their {name}_rect elements, buttons the template has no rect for are ignored.
+    """
+    tree: etree.ElementTree
+    _rects: dict[str, etree.ElementBase]
+    _fills: dict[str, typing.Optional[str]]
+    _pressed: set[str]
+
+    def __init__(self, tree: etree.ElementTree, rects: dict[str, etree.ElementBase]):
+        self.tree = tree
+        # The draw.io editing payload is never rendered, dropping it halves what is serialised per change
+        tree.getroot().attrib.pop('content', None)
+        self._rects = rects
+        self._fills = {}
+        self._pressed = set()
+
+    def highlight(self, pressed: set[str]) -> bool:
+        """ Fill the rects of pressed buttons red and restore released ones, returns whether anything changed """
+        pressed = {button_name for button_name in pressed if button_name in self._rects}
+        if pressed == self._pressed:
+            return False
+        for button_name in pressed - self._pressed:
+            rect = self._rects[button_name]
+            self._fills.setdefault(button_name, rect.get('fill'))
+            rect.set('fill', 'red')
+        for button_name in self._pressed - pressed:
+            rect = self._rects[button_name]
+            fill = self._fills[button_name]
+            if fill is None:
+                rect.attrib.pop('fill', None)
+            else:
+                rect.set('fill', fill)
+        self._pressed = set(pressed)
+        return True
+
+    def to_bytes(self) -> bytes:
+        return etree.tostring(self.tree)
 
 
 @dataclass
@@ -338,18 +538,29 @@ class DeviceRenderDisplay(QSvgWidget):
     deviceState: dict[str, DeviceState] = field(default_factory=dict)
     parent: typing.Optional['QtWidgets.QWidget'] = None
     selected_device_id: str = field(default='', init=False)
-    _old_template: bytes = field(init=False)
-    _template_cache: dict[str, str] = field(default_factory=dict, init=False)
+    _shown_device: str = field(default='', init=False)
+    _templates: dict[str, DeviceTemplate] = field(default_factory=dict, init=False)
     _index_map: dict[str, dict[str, int]] = field(default_factory=dict, init=False)
 
     def __post_init__(self):
         super(DeviceRenderDisplay, self).__init__(self.parent)
-        self._old_template = b'0'
         # TODO: this is just a temporary load to avoid stretched svgs. There should be a better way to reserve a good size
         self.load("templates/CH Fighterstick USB.svg")
 
+    def load_device_template(self, device: DeviceState) -> typing.Optional[DeviceTemplate]:
+        # TODO: we need mapping here as not all devices are the same reported e.g virpil
+        device_template_path = Path(os.path.join("templates", f"{device.deviceName}.svg"))
+        if not device_template_path.exists():
+            log(f"{device.deviceName} not found in templates", "error")
+            return None
+        templater = Templater(device_template_path, brand_template=device.deviceName)
+        # TODO: pull real bindings here: currently this is a dummy
+        temp_bindings_buttons = device.layout.buttons
+        templater.replace_with_bindings(dict(zip(temp_bindings_buttons, temp_bindings_buttons)))
+        return DeviceTemplate(templater.get_tree(), templater.get_elements('rect'))
+
     # @print_timing
-    # actual timing max 10ms
+    # parse once per device, a frame without button changes costs a set comparison
     def refresh(self):
         if self.selected_device_id not in self.deviceState:
             log(f"{self.selected_device_id} not found in {self.deviceState}")
@@ -357,47 +568,18 @@ class DeviceRenderDisplay(QSvgWidget):
 
         selected_device = self.deviceState[self.selected_device_id]
         selected_device_name = selected_device.deviceName
-        if selected_device_name in self._template_cache:
-            base_template = self._template_cache[selected_device_name]
-        else:
-            # TODO: we need mapping here as not all devices are the same reported e.g virpil
-            device_template_path = Path(os.path.join("templates", f"{selected_device_name}.svg"))
-            if not device_template_path.exists():
-                log(f"{selected_device_name} not found in templates", "error")
-                return
-            templater = Templater(device_template_path, brand_template=selected_device_name)
-            # TODO: pull real bindings here: currently this is a dummy
-            temp_bindings_buttons = selected_device.buttons.keys()
-            templater.replace_with_bindings(dict(zip(temp_bindings_buttons, temp_bindings_buttons)))
-            base_template = templater.get_template_as_bytes()
-            if not base_template:
-                log(f"{selected_device_name} not found in templates", "error")
+        template = self._templates.get(selected_device_name)
+        if template is None:
+            template = self.load_device_template(selected_device)
+            if template is None:
                 return
-            self._template_cache[selected_device_name] = base_template
-
-        # start = time()
-        # TODO 1: cache parsed tree and use references for switching
-        # TODO 2: use stax parser
-        tree = etree.parse(BytesIO(base_template))
-        # print(f"etree parse {(time() - start) * 1000:.2f}ms")
+            self._templates[selected_device_name] = template
 
-        for button_name, pressed in selected_device.buttons.items():
-            if not pressed:
-                continue
-            # start = time()
-            # TODO: we could use XPath class to only compile once
-            # TODO: usually you would do something lie /svg:svg/svg:g/svg:rect[@id='Button_1'] but somehow this seems to not work
-            # TODO: don't map unbound buttons by checking list length
-            button_in_xml = tree.xpath(f"/svg:svg/svg:g/svg:rect[@id='{button_name}_rect']",
-                                       namespaces={'svg': 'http://www.w3.org/2000/svg'})[0]
-            # print(f"xpath {(time() - start) * 1000:.2f}ms")
-            button_in_xml.attrib['fill'] = 'red'
-
-        new_bytes = etree.tostring(tree)
-        if new_bytes != self._old_template:
+        changed = template.highlight(selected_device.pressed_buttons())
+        if changed or selected_device_name != self._shown_device:
             log(f"update render for {self.selected_device_id}")
-            self.load(new_bytes)
-            self._old_template = new_bytes
+            self.load(template.to_bytes())
+            self._shown_device = selected_device_name
             self.update()
 
 
@@ -407,7 +589,6 @@ class VisualizerWindow(QtWidgets.QMainWindow):
     parent: typing.Optional['QtWidgets.QWidget'] = None
     device_render_display: DeviceRenderDisplay = None
     _stick_selector: QtWidgets.QComboBox = field(default='', init=False)
-    _connected_devices: int = field(default=-1, init=False)
 
     def __post_init__(self) -> None:
         super(VisualizerWindow, self).__init__(self.parent)
@@ -439,17 +620,17 @@ class VisualizerWindow(QtWidgets.QMainWindow):
         switch_action: QtWidgets.QAction = self.stick_selector.itemData(self.stick_selector.currentIndex())
         self.device_render_display.selected_device_id = switch_action.text()
         log(f"switch selected device to {self.device_render_display.selected_device_id}")
+        self.device_render_display.refresh()
 
-    def refresh(self):
+    def refresh(self, changes: DeviceChanges):
+        """ Called with the changes of one or more frames, repaints the selected device at most once """
         if self.device_render_display:
             known_devices: list[str] = []
-            currently_connected_devices = len(self.deviceState)
-            if currently_connected_devices != self._connected_devices:
-                self._connected_devices = currently_connected_devices
-                log(f"Updating {currently_connected_devices} devices")
+            if any(names is None for names in changes.values()):
+                log(f"Updating {len(self.deviceState)} devices")
 
                 # Add new devices
-                for device_id, device_state in self.deviceState.items():
+                for device_id, device_state in list(self.deviceState.items()):
                     known_devices.append(device_state.deviceName)
                     stick_present = False
                     for i in range(self.stick_selector.count()):
@@ -472,4 +653,5 @@ class VisualizerWindow(QtWidgets.QMainWindow):
                         log(f"removing item {item_text}")
                         self.stick_selector.removeItem(i)
 
-            self.device_render_display.refresh()
+            if self.device_render_display.selected_device_id in changes:
+                self.device_render_display.refresh()
@@ -0,0 +1,99 @@
+"""
+Command line export, for scripts and machines without a display
+
+python -m joystick_diagrams export --source dcs|jg PATH [--profiles ...] [--out DIR] [--jobs N]
+
+Runs from the application directory like the GUI (config.cfg, templates and logs are looked up there).
+Nothing in here imports PyQt5 or pygame.
+"""
+import argparse
+import os
+import sys
+from typing import Optional
+
+import config
+import functions.helper as helper
+from classes.export import OUTPUT_FORMATS, Export
+from classes.export_manifest import ExportManifest
+
+SOURCES = ('dcs', 'jg')
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='joystick_diagrams', description='Create diagrams for your devices')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help='export diagrams without starting the GUI')
+    export.add_argument('--source', nargs=2, metavar=('{dcs,jg}', 'PATH'), required=True,
+                        help='dcs and the DCS World saved games folder, or jg and a Joystick Gremlin profile')
+    export.add_argument('--profiles', nargs='+', default=[], metavar='PROFILE',
+                        help='profiles (DCS) or modes (Joystick Gremlin) to export, all when omitted')
+    export.add_argument('--out', default='./diagrams/', metavar='DIR', help='output directory')
+    export.add_argument('--jobs', type=int, default=None, metavar='N',
+                        help='files parsed and diagrams rendered in parallel, defaults to Jobs in config.cfg')
+    export.add_argument('--format', choices=OUTPUT_FORMATS, default=None, help='defaults to config.cfg')
+    export.add_argument('--templates', default='./templates/', metavar='DIR', help='templates directory')
+    export.add_argument('--keep-easy-modes', action='store_true', help='DCS: export easy mode profiles too')
+    export.add_argument('--state-dir', default=None, metavar='DIR',
+                        help='where the export manifest and DCS parse cache are kept, defaults to the logs directory')
+    return parser
+
+
+def load_bindings(source: str, source_path: str, profiles: list[str], jobs: int,
+                  remove_easy_modes: bool = True, state_directory: str = helper.logDir) -> dict[str, dict[str, dict]]:
+    if source == 'dcs':
+        import adaptors.dcs_world as dcs
+        from adaptors.dcs_world_cache import DCSParseCache
+        parse_cache = None
+        if config.dcs_parse_cache:
+            parse_cache = DCSParseCache(os.path.join(state_directory, 'dcs_parse_cache.pickle'))
+        parser = dcs.DCSWorldParser(source_path, remove_easy_modes=remove_easy_modes,
+                                    parser_backend=config.dcs_parser, parse_cache=parse_cache)
+        return parser.process_profiles(profiles, config.dcs_stream_key_diffs, jobs)
+
+    import adaptors.joystick_gremlin as jg
+    if not os.path.isfile(source_path):
+        raise FileNotFoundError(f"Joystick Gremlin profile {source_path} does not exist")
+    parser = jg.JoystickGremlin(source_path)
+    parser.layered_inheritance = config.jg_layered_inheritance
+    return parser.create_dictionary(profiles)
+
+
+def export(arguments: argparse.Namespace) -> int:
+    source, source_path = arguments.source
+    if source not in SOURCES:
+        print(f"Unknown source {source}, expected one of {', '.join(SOURCES)}", file=sys.stderr)
+        return 2
+    # --jobs sets both pools, otherwise parsing follows [DCS] Jobs and rendering [EXPORT] Jobs
+    parse_jobs = arguments.jobs if arguments.jobs is not None else config.dcs_jobs
+    jobs = arguments.jobs if arguments.jobs is not None else config.export_jobs
+    state_directory = arguments.state_dir if arguments.state_dir is not None else helper.logDir
+
+    data = load_bindings(source, source_path, arguments.profiles, parse_jobs, not arguments.keep_easy_modes,
+                         state_directory)
+    exporter = Export(data, source.upper())
+    exporter.export_directory = os.path.join(arguments.out, '')
+    exporter.templates_directory = os.path.join(arguments.templates, '')
+    exporter.jobs = jobs
+    if arguments.format is not None:
+        exporter.output_format = arguments.format
+    if config.export_skip_unchanged:
+        exporter.manifest = ExportManifest(os.path.join(state_directory, 'export_manifest.json'))
+        exporter.remove_stale = not arguments.profiles
+        exporter.source = source_path
+    for item in exporter.export_config():
+        print(item)
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    arguments = create_argument_parser().parse_args(argv)
+    try:
+        return export(arguments)
+    except Exception as error:
+        helper.log(str(error), 'error')
+        print(f"Export failed: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
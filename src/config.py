@@ -13,3 +13,24 @@ export = 1
 ## Program can automatically open in browser as it creates, specify below if you want this. Only supports Chrome right now.
 open_in_browser = config.getboolean('BROWSER', 'OpenTemplatesInBrowser', fallback=False)
 chrome_path = config.get('BROWSER', 'ChromePath', fallback='chrome.exe')
+
+# Export work spread over a pool when Jobs > 1, Pool = process or thread
+export_jobs = config.getint('EXPORT', 'Jobs', fallback=1)
+export_pool = config.get('EXPORT', 'Pool', fallback='process')
+# Output files: svg, svgz or zip
+export_format = config.get('EXPORT', 'Format', fallback='svg')
+# Keep a manifest of exported content in the logs directory and skip unchanged diagrams
+export_skip_unchanged = config.getboolean('EXPORT', 'SkipUnchanged', fallback=True)
+
+# Times per second the live visualizer reads joystick events, kept within 1 - 1000
+visualizer_poll_rate = min(max(config.getint('VISUALIZER', 'PollRate', fallback=20), 1), 1000)
+
+# Joystick Gremlin inherited modes as layered views over their parent instead of merged copies
+jg_layered_inheritance = config.getboolean('JOYSTICK_GREMLIN', 'LayeredInheritance', fallback=False)
+
+# DCS World profile parsing: Parser = ply or fast, StreamKeyDiffs only reads keyDiffs, Jobs > 1 parses in a process pool
+dcs_parser = config.get('DCS', 'Parser', fallback='ply')
+dcs_stream_key_diffs = config.getboolean('DCS', 'StreamKeyDiffs', fallback=False)
+dcs_jobs = config.getint('DCS', 'Jobs', fallback=1)
+# Keep parsed files in the logs directory and only parse files changed since the last export
+dcs_parse_cache = config.getboolean('DCS', 'ParseCache', fallback=True)
@@ -1,6 +1,5 @@
 import os
 import typing
-import webbrowser
 from time import time
 
 import config
@@ -11,7 +10,18 @@ import logging
 logDir = './logs/'
 logFile = 'jv.log'
 logger = logging.getLogger('jv')
-webbrowser.register('chrome', None, webbrowser.BackgroundBrowser(config.chrome_path))
+# The log file handler and the chrome browser are set up on first use, not when the module is imported
+_logger_configured = False
+_browser = None
+
+
+def get_browser():
+    global _browser
+    if _browser is None:
+        import webbrowser
+        webbrowser.register('chrome', None, webbrowser.BackgroundBrowser(config.chrome_path))
+        _browser = webbrowser.get('chrome')
+    return _browser
 
 
 def create_directory(directory: str) -> bool:
@@ -27,6 +37,8 @@ def log(text: str, level: str = 'info') -> None:
     # Accepted Levels
     # info, warning, error
     if config.debug:
+        if not _logger_configured:
+            configure_logger()
         if level == 'info':
             logger.info(text)
         elif level == 'warning':
@@ -52,18 +64,21 @@ def get_version() -> str:
     return "Version: " + version.VERSION
 
 
-if not os.path.exists(logDir):
-    dir_created = create_directory(logDir)
-    assert dir_created
-handler = logging.FileHandler(logDir + logFile)
-formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
-if config.debugLevel == 1:
-    logger.setLevel(logging.WARNING)
-elif config.debugLevel == 2:
-    logger.setLevel(logging.ERROR)
-elif config.debugLevel == 3:
-    logger.setLevel(logging.DEBUG)
-else:
-    logger.setLevel(logging.WARNING)
+def configure_logger() -> None:
+    global _logger_configured
+    _logger_configured = True
+    if not os.path.exists(logDir):
+        dir_created = create_directory(logDir)
+        assert dir_created
+    handler = logging.FileHandler(logDir + logFile)
+    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+    if config.debugLevel == 1:
+        logger.setLevel(logging.WARNING)
+    elif config.debugLevel == 2:
+        logger.setLevel(logging.ERROR)
+    elif config.debugLevel == 3:
+        logger.setLevel(logging.DEBUG)
+    else:
+        logger.setLevel(logging.WARNING)
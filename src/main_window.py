@@ -0,0 +1,296 @@
+"""Main window of the GUI, started through joystick_diagrams.py"""
+import sys
+from time import perf_counter
+
+STARTED = perf_counter()
+
+import os
+from PyQt5 import QtCore, QtWidgets
+from Ui import Ui_MainWindow as UiMainWindow
+import functions.helper as helper
+import config
+import version
+
+# Adaptors, export and the visualizer (pygame) are imported when first used, so the window shows sooner
+STARTUP_TIMING_FLAG = '--startup-timing'
+
+
+class ExportSignals(QtCore.QObject):
+    progress = QtCore.pyqtSignal(int)
+    finished = QtCore.pyqtSignal(list)
+    failed = QtCore.pyqtSignal(str)
+
+
+class ExportWorker(QtCore.QRunnable):
+    """ Runs an export on the thread pool, progress and the result reach the window through queued signals """
+
+    def __init__(self, exporter: 'classes.export.Export'):
+        super().__init__()
+        self.exporter = exporter
+        self.signals = ExportSignals()
+        # Kept alive by the window until its result has been handled
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            result = self.exporter.export_config(self.signals.progress.emit)
+        except Exception as error:
+            helper.log(str(error), 'error')
+            self.signals.failed.emit(str(error))
+        else:
+            self.signals.finished.emit(result)
+
+
+class MainWindow(QtWidgets.QMainWindow, UiMainWindow):
+    jg_modes: list[str]
+
+    def __init__(self, *args, obj=None, **kwargs):
+        super(MainWindow, self).__init__(*args, **kwargs)
+        self.jg_devices = []
+        self.jg_modes = []
+        self.jg_file = None
+        self.dcs_directory = None
+
+        self.setupUi(self)
+        self.setVersion()
+        # Clean up GUI Defaults
+        self.dcs_profiles_list.clear()
+        self.jg_profile_list.clear()
+        self.application_information_textbrowser.clear()
+        # DCS UI Setup
+        self.dcs_selected_directory_label.setText('')
+        self.dcs_parser_instance = None
+        self.dcs_parse_cache = None
+        self.export_manifest = None
+        self.export_worker = None
+        self.export_button_text = self.export_button.text()
+        self.jg_parser_instance = None
+        self.dcs_easy_mode_checkbox.stateChanged.connect(self.easy_mode_checkbox_action)
+        self.dcs_directory_select_button.clicked.connect(self.set_dcs_directory)
+        self.export_button.clicked.connect(self.export_profiles)
+        self.parser_selector.currentChanged.connect(self.change_export_button)
+        self.change_export_button()
+
+        # JG UI Setup
+        self.jg_select_profile_button.clicked.connect(self.set_jg_file)
+
+    def setVersion(self):
+        version_text = version.VERSION
+        self.label_9.setText(version_text)
+        self.setWindowTitle("Joystick Diagrams - V" + version_text)
+
+    def change_export_button(self):
+        if self.export_worker is not None:
+            return  # Stays enabled to cancel the running export
+        if self.parser_selector.currentIndex() == 0:
+            if self.jg_parser_instance:
+                self.export_button.setEnabled(1)
+            else:
+                self.export_button.setDisabled(1)
+        elif self.parser_selector.currentIndex() == 1:
+            if self.dcs_parser_instance:
+                self.export_button.setEnabled(1)
+            else:
+                self.export_button.setDisabled(1)
+        else:
+            self.export_button.setDisabled(1)
+
+    def easy_mode_checkbox_action(self):
+        if self.dcs_parser_instance:
+            self.dcs_parser_instance.remove_easy_modes = self.dcs_easy_mode_checkbox.isChecked()
+            self.dcs_profiles_list.clear()
+            self.dcs_profiles_list.addItems(self.dcs_parser_instance.get_validated_profiles())
+
+    def clear_info(self):
+        self.application_information_textbrowser.clear()
+
+    def enable_profile_load_button(self, button):
+        button.setStyleSheet('background: #007acc; color: white;')
+
+    def disable_profile_load_button(self, button):
+        button.setStyleSheet('color:white; border: 1px solid white;')
+
+    def print_to_info(self, error):
+        self.application_information_textbrowser.append(error)
+        self.application_information_textbrowser.verticalScrollBar().setValue(
+            self.application_information_textbrowser.verticalScrollBar().maximum())
+
+    def set_dcs_directory(self):
+        self.dcs_directory = QtWidgets.QFileDialog.getExistingDirectory(self, "Select DCS Saved Games Directory",
+                                                                        os.path.expanduser("~"))
+
+        if self.dcs_directory:
+            try:
+                self.load_dcs_directory()
+            except Exception as e:
+                self.print_to_info("Error: {}".format(e))
+        else:
+            self.print_to_info("No DCS Directory Selected")
+
+    def load_dcs_directory(self):
+        import adaptors.dcs_world as dcs
+        from adaptors.dcs_world_cache import DCSParseCache
+        if config.dcs_parse_cache and self.dcs_parse_cache is None:
+            self.dcs_parse_cache = DCSParseCache(os.path.join(helper.logDir, 'dcs_parse_cache.pickle'))
+        try:
+            self.dcs_profiles_list.clear()
+            self.dcs_parser_instance = dcs.DCSWorldParser(self.dcs_directory,
+                                                          remove_easy_modes=self.dcs_easy_mode_checkbox.isChecked(),
+                                                          parser_backend=config.dcs_parser,
+                                                          parse_cache=self.dcs_parse_cache)
+            self.print_to_info('Successfully loaded DCS profiles')
+            self.enable_profile_load_button(self.dcs_directory_select_button)
+            self.dcs_selected_directory_label.setText('in {}'.format(self.dcs_directory))
+            self.export_button.setEnabled(1)
+        except Exception:
+            self.disable_profile_load_button(self.dcs_directory_select_button)
+            self.export_button.setEnabled(0)
+            self.dcs_selected_directory_label.setText('')
+            raise
+        else:
+            self.dcs_profiles_list.clear()
+            self.dcs_profiles_list.addItems(self.dcs_parser_instance.get_validated_profiles())
+
+    def set_jg_file(self):
+        self.jg_file = QtWidgets.QFileDialog.getOpenFileName(self, "Select Joystick Gremlin Config file", None,
+                                                             "Gremlin XMl Files (*.xml)")[0]
+
+        if self.jg_file:
+            try:
+                self.load_jg_file()
+            except Exception as e:
+                self.print_to_info("Error Loading File: {}".format(e))
+        else:
+            self.print_to_info("No File Selected")
+
+    def load_jg_file(self):
+        import adaptors.joystick_gremlin as jg
+        try:
+            self.jg_parser_instance = jg.JoystickGremlin(self.jg_file)
+            self.jg_parser_instance.layered_inheritance = config.jg_layered_inheritance
+            self.jg_devices = self.jg_parser_instance.get_device_names()
+            self.jg_modes = self.jg_parser_instance.get_modes()
+            self.enable_profile_load_button(self.jg_select_profile_button)
+            self.jg_profile_list.clear()
+            self.jg_profile_list.addItems(self.jg_modes)
+            self.export_button.setEnabled(1)
+        except Exception as e:
+            self.disable_profile_load_button(self.jg_select_profile_button)
+            self.jg_profile_list.clear()
+            self.export_button.setEnabled(0)
+            raise
+
+    def export_profiles(self):
+        if self.export_worker is not None:
+            self.export_worker.exporter.cancel()
+            self.print_to_info("Cancelling Export")
+            return
+        if self.parser_selector.currentIndex() == 0:  # JOYSTICK GREMLIN
+            selected_profiles = self.jg_profile_list.selectedItems()
+            if len(selected_profiles) > 0:
+                profiles = []
+                for item in selected_profiles:
+                    profiles.append(item.text())
+                self.print_to_info("Exporting the following profile(s): {}".format(profiles))
+                data = self.jg_parser_instance.create_dictionary(profiles)
+            else:
+                data = self.jg_parser_instance.create_dictionary()
+            self.export_to_svg(data, 'JG', self.jg_file, remove_stale=len(selected_profiles) == 0)
+        elif self.parser_selector.currentIndex() == 1:  # DCS
+            selected_profiles = self.dcs_profiles_list.selectedItems()
+            if len(selected_profiles) > 0:
+                profiles = []
+                for item in selected_profiles:
+                    profiles.append(item.text())
+                self.print_to_info("Exporting the following profile(s): {}".format(profiles))
+                # The directory was scanned when it was loaded, profiles may have been edited since
+                data = self.dcs_parser_instance.process_profiles(profiles, config.dcs_stream_key_diffs,
+                                                                 config.dcs_jobs, rescan=True)
+            else:
+                data = self.dcs_parser_instance.process_profiles(stream_key_diffs=config.dcs_stream_key_diffs,
+                                                                 jobs=config.dcs_jobs, rescan=True)
+            self.export_to_svg(data, 'DCS', self.dcs_directory, remove_stale=len(selected_profiles) == 0)
+        else:
+            pass  # no other tabs have functionality right now
+
+    def export_to_svg(self, data, parser_type: str, source: str = '', remove_stale: bool = False):
+        import classes.export as export
+        from classes.export_manifest import ExportManifest
+
+        self.export_progress_bar.setValue(0)
+        self.clear_info()
+        self.print_to_info("Export Started")
+        exporter = export.Export(data, parser_type)
+        if config.export_skip_unchanged:
+            if self.export_manifest is None:
+                self.export_manifest = ExportManifest(os.path.join(helper.logDir, 'export_manifest.json'))
+            exporter.manifest = self.export_manifest
+            exporter.remove_stale = remove_stale
+            exporter.source = source
+        self.export_worker = ExportWorker(exporter)
+        self.export_worker.signals.progress.connect(self.export_progress_bar.setValue)
+        self.export_worker.signals.finished.connect(self.export_finished)
+        self.export_worker.signals.failed.connect(self.export_failed)
+        self.export_button.setText("Cancel Export")
+        QtCore.QThreadPool.globalInstance().start(self.export_worker)
+
+    def export_finished(self, success: list):
+        for item in success:
+            self.print_to_info(item)
+        self.print_to_info("Export Finished")
+        helper.log(str(success), 'info')
+        self.export_done()
+
+    def export_failed(self, error: str):
+        self.print_to_info("Export Failed: {}".format(error))
+        self.export_done()
+
+    def export_done(self):
+        self.export_worker = None
+        self.export_button.setText(self.export_button_text)
+        self.change_export_button()
+
+
+def report_startup(stage: str) -> None:
+    if STARTUP_TIMING_FLAG in sys.argv:
+        message = "Startup {}: {:.0f} ms".format(stage, (perf_counter() - STARTED) * 1000)
+        print(message)
+        helper.log(message, 'info')
+
+
+class VisualizerLoader:
+    """ Opens the visualizer once the main window is up, pygame is only imported and initialised then """
+
+    def __init__(self):
+        self.window = None
+
+    def show(self):
+        import pygame
+        from classes.visualizer import VisualizerWindow
+        pygame.init()
+        self.window = VisualizerWindow()
+        self.window.show()
+        report_startup("visualizer shown")
+
+    def close(self):
+        if self.window is not None:
+            import pygame
+            pygame.quit()
+
+
+def main() -> None:
+    visualizer = VisualizerLoader()
+    try:
+        report_startup("imports done")
+        app = QtWidgets.QApplication(sys.argv)
+        window = MainWindow()
+        window.show()
+        report_startup("main window shown")
+        QtCore.QTimer.singleShot(0, visualizer.show)
+
+        app.exec()
+    except Exception as error:
+        helper.log(str(error), "error")
+        raise
+    finally:
+        visualizer.close()
@@ -1,10 +1,17 @@
 """
-  This script can be used to add id attributes which will be pulled by the visualizer
+  This script can be used to add id attributes which will be pulled by the visualizer,
+  then writes each template's placeholder index (<template>.index.json) used by the export and templater
+
+  python sync_ids.py          add ids and write the indexes
+  python sync_ids.py --index  only write the indexes, templates are left untouched
 """
 import os, sys
 
 from lxml import etree
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from classes.template_engine import write_template_index
+
 
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
@@ -33,21 +40,29 @@ def add_ids(file: str):
     tree.write(file)
 
 
-def try_add_ids(file: str):
+def add_index(file: str):
+    index = write_template_index(file)
+    print(f"indexed {file}: {len(index.placeholders)} placeholders, {len(index.elements)} elements")
+
+
+def try_add_ids(file: str, index_only: bool = False):
     try:
-        add_ids(file)
+        if not index_only:
+            add_ids(file)
+        add_index(file)
     except:
         print(f"faulty template {file}", file=sys.stderr)
 
 
-custom = os.listdir(path=f"templates{os.sep}Custom")
-for file in custom:
-    try_add_ids(f"templates{os.sep}Custom{os.sep}{file}")
-user_submitted = os.listdir(path=f"templates{os.sep}User Submitted")
-for file in user_submitted:
-    try_add_ids(f"templates{os.sep}User Submitted{os.sep}{file}")
-templates = os.listdir(path="templates")
-for file in templates:
-    if file in ["Custom", "User Submitted", "readme.md"]:
-        continue
-    try_add_ids(f"templates{os.sep}{file}")
+def sync_directory(directory: str, index_only: bool = False):
+    for file in os.listdir(path=directory):
+        # Only templates, the index files written next to them are skipped
+        if file.endswith(".svg"):
+            try_add_ids(f"{directory}{os.sep}{file}", index_only)
+
+
+if __name__ == '__main__':
+    index_only = '--index' in sys.argv[1:]
+    sync_directory(f"templates{os.sep}Custom", index_only)
+    sync_directory(f"templates{os.sep}User Submitted", index_only)
+    sync_directory("templates", index_only)
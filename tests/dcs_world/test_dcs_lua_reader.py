@@ -0,0 +1,97 @@
+import unittest
+from pathlib import Path
+
+import adaptors.dcs_world as dcs
+from adaptors.dcs_world_lua import iter_key_bindings, parse_lua_table
+
+
+class TestDCSLuaReader(unittest.TestCase):
+    directory = './tests/data/dcs_world/valid_dcs_world_directory'
+
+    def test_matches_ply_parser(self):
+        ply_instance = dcs.DCSWorldParser(self.directory)
+        for diff_file in sorted(Path(self.directory).glob('Config/Input/*/joystick/*.diff.lua')):
+            ply_instance.file = diff_file.read_text(encoding="utf-8").replace('local diff = ', '').replace(
+                'return diff', '')
+            expected = ply_instance.parseFile()
+            data = parse_lua_table(ply_instance.file)
+            self.assertEqual(data, expected)
+            self.assertEqual(repr(data), repr(expected))
+
+    def test_process_profiles_fast_backend(self):
+        ply_data = dcs.DCSWorldParser(self.directory, remove_easy_modes=False).process_profiles()
+        fast_data = dcs.DCSWorldParser(self.directory, remove_easy_modes=False,
+                                       parser_backend=dcs.PARSER_FAST).process_profiles()
+        self.assertEqual(fast_data, ply_data)
+
+    def test_value_types(self):
+        data = parse_lua_table('{ [1] = "a b", ["x"] = { [2] = -0.5, ["on"] = true, ["off"] = false, }, [3] = 7 }')
+        self.assertEqual(data, {1: 'a b', 'x': {2: -0.5, 'on': True, 'off': False}, 3: 7})
+
+    def test_invalid_table(self):
+        with self.assertRaises(ValueError):
+            parse_lua_table('{ ["a"] = { ["b"] = 1 }')
+        with self.assertRaises(ValueError):
+            parse_lua_table('{ ["a"] = }')
+        with self.assertRaises(ValueError):
+            parse_lua_table('{ "a" }')
+
+    def test_rejects_what_ply_rejects(self):
+        ply_instance = dcs.DCSWorldParser(self.directory)
+        malformed = [
+            '{ ["a"] = 1 ["b"] = 2 }',
+            '{ ["a"] = { ["b"] = 1 } ["c"] = 2 }',
+            '{ ["a"] = { ["b"] = 1 } 3 }',
+            '{ ["a"] = 1 } }',
+            '{ ["a"] = {} }',
+            '{ , ["a"] = 1 }',
+            '{ ["a"] = 1,, }',
+            '{ ["a"] = ["b"] = 1 }',
+            '{ ["a"] = 1 } ["b"] = 2',
+            '{ ["a"] = 1 } true',
+        ]
+        for text in malformed:
+            with self.subTest(text=text):
+                ply_instance.file = text
+                self.assertIsNone(ply_instance.parseFile())
+                with self.assertRaises(ValueError):
+                    parse_lua_table(text)
+                self.assertIsNone(dcs.parse_lua(text, dcs.PARSER_FAST))
+
+    def test_accepts_what_ply_accepts(self):
+        ply_instance = dcs.DCSWorldParser(self.directory)
+        valid = {
+            '{ ["a"] = -1, ["b"] = +2, ["c"] = -0.5 }': {'a': -1, 'b': 2, 'c': -0.5},
+            '{ ["a"] = 1 } trailing text': {'a': 1},
+            '{ ["a"] = 1, }\n-- comment\n': {'a': 1},
+        }
+        for text, expected in valid.items():
+            with self.subTest(text=text):
+                ply_instance.file = text
+                self.assertEqual(ply_instance.parseFile(), expected)
+                self.assertEqual(parse_lua_table(text), expected)
+
+    def test_streaming_matches_full_parse(self):
+        full_data = dcs.DCSWorldParser(self.directory, remove_easy_modes=False).process_profiles()
+        streamed_data = dcs.DCSWorldParser(self.directory, remove_easy_modes=False).process_profiles(
+            stream_key_diffs=True)
+        self.assertEqual(streamed_data, full_data)
+
+    def test_streaming_skips_other_tables(self):
+        text = ('{ ["axisDiffs"] = { ["a"] = { ["name"] = "Pitch {x}", ["added"] = { [1] = { ["key"] = "JOY_Y" } } } },'
+                ' ["keyDiffs"] = { ["d1"] = { ["added"] = { [1] = { ["key"] = "JOY_BTN3", }, }, ["name"] = "Fire", },'
+                ' ["d2"] = { ["name"] = "Removed", ["removed"] = { [1] = { ["key"] = "JOY_BTN4" } } } },'
+                ' ["ffb"] = { ["gain"] = 1.0 } }')
+        self.assertEqual(list(iter_key_bindings(text)), [('JOY_BTN3', 'Fire')])
+        self.assertEqual(dcs.DCSWorldParser.stream_button_array(text), {'BUTTON_3': 'Fire'})
+
+    def test_streaming_without_key_diffs(self):
+        self.assertIsNone(dcs.DCSWorldParser.stream_button_array('{ ["axisDiffs"] = { ["a"] = { ["name"] = "x" } } }'))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            dcs.DCSWorldParser(self.directory, parser_backend='lupa')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -128,6 +128,23 @@ class TestDCS_Parse_Test(unittest.TestCase):
         data = self.dcs_instance.process_profiles([profiles[0], profiles[1]])
         self.assertEqual(data, expected)
 
+    def test_process_pool_matches_serial(self):
+        serial = dcs.DCSWorldParser('./tests/data/dcs_world/valid_dcs_world_directory', remove_easy_modes=False)
+        expected = serial.process_profiles()
+        self.dcs_instance.remove_easy_modes = False
+        data = self.dcs_instance.process_profiles(jobs=2)
+        self.assertEqual(data, expected)
+        self.assertEqual(list(data), list(expected))
+        for device in expected:
+            self.assertEqual(list(data[device]), list(expected[device]))
+
+    def test_parse_device_file(self):
+        file_path = ('./tests/data/dcs_world/valid_dcs_world_directory/Config/Input/CoolPlane-B/joystick/'
+                     'Joystick - HOTAS Warthog {84180FE0-BDD3-11ea-8001-444553540000}.diff.lua')
+        expected = {'BUTTON_19': 'Fast countermeasure dispense', 'BUTTON_5': 'Reference button'}
+        self.assertEqual(dcs.parse_device_file(file_path), expected)
+        self.assertEqual(dcs.parse_device_file(file_path, dcs.PARSER_FAST, stream_key_diffs=True), expected)
+
     def test_no_profiles_parsed(self):
         pass
 
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import adaptors.dcs_world as dcs
+from adaptors.dcs_world_cache import DCSParseCache
+
+
+class TestDCSParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.dcs_path = os.path.join(self.directory.name, 'dcs')
+        shutil.copytree('./tests/data/dcs_world/valid_dcs_world_directory', self.dcs_path)
+        self.cache_path = os.path.join(self.directory.name, 'logs', 'dcs_parse_cache.pickle')
+        self.joystick_path = os.path.join(self.dcs_path, 'Config', 'Input', 'CoolPlane-B', 'joystick')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def process(self) -> tuple[dict, int]:
+        """ Process all profiles with a cache freshly loaded from disk, returns the data and files parsed """
+        parser = dcs.DCSWorldParser(self.dcs_path, remove_easy_modes=False,
+                                    parse_cache=DCSParseCache(self.cache_path))
+        with mock.patch.object(dcs, 'parse_device_file', wraps=dcs.parse_device_file) as parse:
+            data = parser.process_profiles()
+        return data, parse.call_count
+
+    def test_unchanged_files_not_parsed(self):
+        expected = dcs.DCSWorldParser(self.dcs_path, remove_easy_modes=False).process_profiles()
+        data, parsed = self.process()
+        self.assertEqual(data, expected)
+        self.assertEqual(parsed, 5)
+        data, parsed = self.process()
+        self.assertEqual(data, expected)
+        self.assertEqual(parsed, 0)
+
+    def test_changed_file_parsed(self):
+        self.process()
+        file_path = os.path.join(self.joystick_path, os.listdir(self.joystick_path)[0])
+        with open(file_path, 'a', encoding='utf-8') as diff_file:
+            diff_file.write('\n')
+        _, parsed = self.process()
+        self.assertEqual(parsed, 1)
+
+    def test_deleted_file_dropped(self):
+        self.process()
+        self.assertEqual(len(DCSParseCache(self.cache_path)), 5)
+        shutil.rmtree(os.path.join(self.dcs_path, 'Config', 'Input', 'CoolPlane-B'))
+        _, parsed = self.process()
+        self.assertEqual(parsed, 0)
+        self.assertEqual(len(DCSParseCache(self.cache_path)), 3)
+
+    def test_unreadable_cache_ignored(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, 'wb') as cache_file:
+            cache_file.write(b'not a pickle')
+        _, parsed = self.process()
+        self.assertEqual(parsed, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
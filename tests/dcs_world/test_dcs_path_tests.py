@@ -33,6 +33,34 @@ class TestDCSPaths(unittest.TestCase):
             dcs.DCSWorldParser('./tests/data/dcs_world/dynamic_folder_creation')
         self.assertTrue('DCS: No profiles exist in Input directory!' in str(context.exception))
 
+    def test_profile_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, 'Config', 'Input')
+            shutil.copytree('./tests/data/dcs_world/valid_dcs_world_directory/Config/Input/CoolPlane-B',
+                            os.path.join(input_path, 'CoolPlane-B'))
+            os.makedirs(os.path.join(input_path, 'No Joystick', 'keyboard'))
+            os.makedirs(os.path.join(input_path, 'CoolPlane-B', 'joystick', 'Backup Folder'))
+            with open(os.path.join(input_path, 'modifiers.lua'), 'w') as stray_file:
+                stray_file.write('')
+
+            instance = dcs.DCSWorldParser(directory)
+            self.assertEqual(instance.valid_profiles, ['CoolPlane-B'])
+            self.assertEqual(sorted(device_file.device for device_file in instance.profile_index['CoolPlane-B']),
+                             ['Joystick - HOTAS Warthog', 'Throttle - HOTAS Warthog'])
+            self.assertEqual(len(instance.process_profiles()), 2)
+
+    def test_profile_index_reused(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, 'Config', 'Input')
+            shutil.copytree('./tests/data/dcs_world/valid_dcs_world_directory/Config/Input/CoolPlane-B',
+                            os.path.join(input_path, 'CoolPlane-B'))
+            instance = dcs.DCSWorldParser(directory)
+            indexed = instance.profile_index['CoolPlane-B']
+            self.assertIs(instance.get_device_files(['CoolPlane-B'])[0], indexed[0])
+            for device_file in indexed:
+                os.remove(device_file.path)
+            self.assertEqual(instance.get_device_files(['CoolPlane-B'], rescan=True), [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import gzip
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+import classes.export as export
+
+
+class TestExportFormats(unittest.TestCase):
+    data = {
+        'VPC Throttle MT-50 CM2': {
+            'A10': {'Axis': '', 'Buttons': {'BUTTON_1': 'Flaps Up', 'BUTTON_2': 'NO BIND'}, 'Inherit': False},
+            'F18': {'Axis': '', 'Buttons': {'BUTTON_1': 'Launch Bar'}, 'Inherit': False},
+        },
+        'VPC Stick MT-50CM': {
+            'A10': {'Axis': '', 'Buttons': {'BUTTON_3': 'Trim Up'}, 'Inherit': False},
+        },
+    }
+
+    def export(self, output_format: str, jobs: int = 1) -> tuple[export.Export, str]:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        exporter = export.Export(self.data, 'JG')
+        exporter.export_directory = directory.name + '/'
+        exporter.output_format = output_format
+        exporter.jobs = jobs
+        self.assertEqual(exporter.export_config(), [])
+        return exporter, directory.name
+
+    def read_svg(self) -> dict[str, bytes]:
+        _, directory = self.export('svg')
+        files = {}
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name), 'rb') as output_file:
+                files[name] = output_file.read()
+        return files
+
+    def test_svgz(self):
+        _, directory = self.export('svgz')
+        files = {}
+        for name in os.listdir(directory):
+            with gzip.open(os.path.join(directory, name)) as output_file:
+                files[name[:-1]] = output_file.read()
+        self.assertEqual(files, self.read_svg())
+
+    def test_zip(self):
+        for jobs in (1, 2):
+            exporter, directory = self.export('zip', jobs)
+            self.assertEqual(os.listdir(directory), ['JG_diagrams.zip'])
+            with zipfile.ZipFile(exporter.get_archive_path()) as archive:
+                files = {name: archive.read(name) for name in archive.namelist()}
+                self.assertEqual(archive.namelist(), [os.path.basename(job.output_path)
+                                                      for job in exporter.create_export_jobs()])
+            self.assertEqual(files, self.read_svg())
+
+    def test_failed_zip_leaves_no_archive(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        exporter = export.Export(self.data, 'JG')
+        exporter.export_directory = directory.name + '/'
+        exporter.output_format = 'zip'
+        with mock.patch.object(export, 'write_archive_entry', side_effect=OSError('No space left on device')):
+            with self.assertRaises(OSError):
+                exporter.export_config()
+        self.assertEqual(os.listdir(directory.name), [])
+
+    def test_unknown_format(self):
+        exporter = export.Export(self.data, 'JG')
+        exporter.output_format = 'pdf'
+        with self.assertRaises(ValueError):
+            exporter.export_config()
+
+
+if __name__ == '__main__':
+    unittest.main()
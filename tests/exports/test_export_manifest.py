@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import classes.export as export
+from classes.export_manifest import ExportManifest
+
+
+class TestExportManifest(unittest.TestCase):
+    data = {
+        'VPC Stick MT-50CM': {
+            'A10': {'Axis': '', 'Buttons': {'BUTTON_3': 'Trim Up'}, 'Inherit': False},
+            'F18': {'Axis': '', 'Buttons': {'BUTTON_1': 'Launch Bar'}, 'Inherit': False},
+        },
+    }
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.export_directory = os.path.join(self.directory.name, 'diagrams')
+        self.manifest_path = os.path.join(self.directory.name, 'logs', 'export_manifest.json')
+
+    def export(self, data: dict, remove_stale: bool = False, jobs: int = 1, source: str = 'profile_a.xml') -> list[str]:
+        exporter = export.Export(data, 'JG')
+        exporter.export_directory = self.export_directory + '/'
+        exporter.source = os.path.join(self.directory.name, source)
+        exporter.jobs = jobs
+        exporter.pool = 'thread'
+        exporter.manifest = ExportManifest(self.manifest_path)
+        exporter.remove_stale = remove_stale
+        return exporter.export_config()
+
+    def test_unchanged_files_skipped(self):
+        self.assertEqual(self.export(self.data), ['Diagrams written: 2, unchanged: 0, removed: 0'])
+        a10 = os.path.join(self.export_directory, 'JG_VPC Stick MT-50CM_A10.svg')
+        modified = os.stat(a10).st_mtime_ns
+        self.assertEqual(self.export(self.data, jobs=2), ['Diagrams written: 0, unchanged: 2, removed: 0'])
+        self.assertEqual(os.stat(a10).st_mtime_ns, modified)
+
+        changed = {'VPC Stick MT-50CM': dict(self.data['VPC Stick MT-50CM'])}
+        changed['VPC Stick MT-50CM']['A10'] = {'Axis': '', 'Buttons': {'BUTTON_3': 'Trim Down'}, 'Inherit': False}
+        self.assertEqual(self.export(changed), ['Diagrams written: 1, unchanged: 1, removed: 0'])
+
+    def test_deleted_output_written_again(self):
+        self.export(self.data)
+        os.remove(os.path.join(self.export_directory, 'JG_VPC Stick MT-50CM_F18.svg'))
+        self.assertEqual(self.export(self.data), ['Diagrams written: 1, unchanged: 1, removed: 0'])
+
+    def test_stale_outputs_removed(self):
+        self.export(self.data)
+        only_a10 = {'VPC Stick MT-50CM': {'A10': self.data['VPC Stick MT-50CM']['A10']}}
+        self.assertEqual(self.export(only_a10), ['Diagrams written: 0, unchanged: 1, removed: 0'])
+        self.assertEqual(len(os.listdir(self.export_directory)), 2)
+        self.assertEqual(self.export(only_a10, remove_stale=True), ['Diagrams written: 0, unchanged: 1, removed: 1'])
+        self.assertEqual(os.listdir(self.export_directory), ['JG_VPC Stick MT-50CM_A10.svg'])
+
+    def test_other_source_outputs_kept(self):
+        self.export(self.data, remove_stale=True)
+        other = {'T.16000M': {'Landing': {'Axis': '', 'Buttons': {'BUTTON_2': 'Gear'}, 'Inherit': False}}}
+        self.assertEqual(self.export(other, remove_stale=True, source='profile_b.xml'),
+                         ['Diagrams written: 1, unchanged: 0, removed: 0'])
+        self.assertEqual(len(os.listdir(self.export_directory)), 3)
+
+    def test_deleted_directories_dropped(self):
+        self.export(self.data)
+        manifest = ExportManifest(self.manifest_path)
+        self.assertEqual(len(manifest), 2)
+        for name in os.listdir(self.export_directory):
+            os.remove(os.path.join(self.export_directory, name))
+        os.rmdir(self.export_directory)
+        manifest.save()
+        self.assertEqual(len(ExportManifest(self.manifest_path)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import classes.export as export
+
+
+class TestExportParallel(unittest.TestCase):
+    data = {
+        'VPC Throttle MT-50 CM2': {
+            'A10': {'Axis': '', 'Buttons': {'BUTTON_1': 'Flaps Up', 'BUTTON_2': 'NO BIND'}, 'Inherit': False},
+            'F18': {'Axis': '', 'Buttons': {'BUTTON_1': 'Launch Bar'}, 'Inherit': False},
+            'KA50': {'Axis': '', 'Buttons': {}, 'Inherit': False},
+        },
+        'VPC Stick MT-50CM': {
+            'A10': {'Axis': '', 'Buttons': {'BUTTON_3': 'Trim Up'}, 'Inherit': False},
+        },
+        'Other Device No Template': {
+            'A10': {'Axis': '', 'Buttons': {'BUTTON_1': 'Gear'}, 'Inherit': False},
+        }
+    }
+
+    def export(self, jobs: int, pool: str = 'process') -> tuple[list[str], dict[str, str]]:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        exporter = export.Export(self.data, 'JG')
+        exporter.export_directory = directory.name + '/'
+        exporter.jobs = jobs
+        exporter.pool = pool
+        progress = []
+        errors = exporter.export_config(progress.append)
+        self.assertEqual(progress[0], 0)
+        self.assertEqual(progress[-1], 100)
+        self.assertEqual(progress, sorted(progress))
+        files = {}
+        for name in os.listdir(directory.name):
+            with open(os.path.join(directory.name, name), encoding='utf-8') as output_file:
+                files[name] = output_file.read()
+        return errors, files
+
+    def test_thread_pool_matches_serial(self):
+        self.assertEqual(self.export(1), self.export(3, 'thread'))
+
+    def test_process_pool_matches_serial(self):
+        errors, files = self.export(2, 'process')
+        self.assertEqual((errors, files), self.export(1))
+        self.assertEqual(errors, ['No Template for: Other Device No Template'])
+        self.assertEqual(len(files), 4)
+
+    def test_template_removed_after_job_creation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            templates_directory = os.path.join(directory, 'templates')
+            os.mkdir(templates_directory)
+            for device in ('VPC Throttle MT-50 CM2', 'VPC Stick MT-50CM'):
+                shutil.copy(os.path.join('templates', device + '.svg'), templates_directory)
+            for jobs, output_format in ((1, 'svg'), (2, 'svg'), (1, 'zip')):
+                exporter = export.Export(self.data, 'JG')
+                exporter.export_directory = os.path.join(directory, 'diagrams', output_format + str(jobs), '')
+                exporter.templates_directory = os.path.join(templates_directory, '')
+                exporter.jobs = jobs
+                exporter.pool = 'thread'
+                exporter.output_format = output_format
+                jobs_before = exporter.create_export_jobs
+                stick_template = os.path.join(templates_directory, 'VPC Stick MT-50CM.svg')
+
+                def create_export_jobs():
+                    created = jobs_before()
+                    os.rename(stick_template, stick_template + '.removed')
+                    return created
+                exporter.create_export_jobs = create_export_jobs
+                errors = exporter.export_config()
+                os.rename(stick_template + '.removed', stick_template)
+                self.assertIn('No Template for: VPC Stick MT-50CM', errors)
+                self.assertIn('No Template for: Other Device No Template', errors)
+
+    def test_jobs_created_without_compiling(self):
+        exporter = export.Export(self.data, 'JG')
+        with mock.patch.object(export.template_cache, 'get') as get:
+            export_jobs = exporter.create_export_jobs()
+        get.assert_not_called()
+        self.assertEqual(len(export_jobs), 4)
+        self.assertEqual(exporter.error_bucket, ['No Template for: Other Device No Template'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -53,6 +53,12 @@ class TestExport_Template(unittest.TestCase):
         self.exporter.export_config()
         self.assertEqual(len(os.listdir(self.template.name + '/new/')), 2)
 
+    def test_missing_template_reported(self):
+        exporter = export.Export({'Not a Template': {'Base': {'Buttons': {}, 'Axis': '', 'Inherit': False}}})
+        exporter.export_directory = self.template.name + '/'
+        self.assertEqual(exporter.export_config(), ['No Template for: Not a Template'])
+        self.assertEqual(len(os.listdir(self.template.name)), 0)
+
     def test_unused_strings_replaced(self):
         data = self.exporter.replace_unused_strings("<Item>BUTTON_26</Item>Some Text - Some more Text BUTTON_87")
         self.assertEqual(data, "<Item>No Bind</Item>Some Text - Some more Text No Bind")
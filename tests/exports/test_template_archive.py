@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from classes import template_archive
+from classes.template_archive import ARCHIVE_NAME, compact_templates, restore_templates, split_drawio_content
+from classes.template_engine import TemplateCache
+
+
+class TestTemplateArchive(unittest.TestCase):
+    template = ('<?xml version="1.0"?>\r\n<svg xmlns="http://www.w3.org/2000/svg" width="10" '
+                'content="&lt;mxfile&gt;abc&lt;/mxfile&gt;" style="x"><t>BUTTON_1</t></svg>')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        os.mkdir(os.path.join(self.directory.name, 'Custom'))
+        self.template_path = Path(self.directory.name, 'Custom', 'Stick.svg')
+        self.template_path.write_bytes(self.template.encode('utf-8'))
+
+    def test_split_without_content(self):
+        self.assertEqual(split_drawio_content('<svg width="1"/>'), ('<svg width="1"/>', None))
+
+    def test_round_trip(self):
+        self.assertEqual(compact_templates(self.directory.name), ['Custom/Stick.svg'])
+        slim = self.template_path.read_text(encoding='utf-8')
+        self.assertNotIn('content=', slim)
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, ARCHIVE_NAME)))
+        self.assertEqual(TemplateCache().get(self.template_path).render((), 'NB'), slim.replace('BUTTON_1', 'NB'))
+        self.assertEqual(compact_templates(self.directory.name), [])
+
+        self.assertEqual(restore_templates(self.directory.name), ['Custom/Stick.svg'])
+        self.assertEqual(self.template_path.read_bytes(), self.template.encode('utf-8'))
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, ARCHIVE_NAME)))
+
+    def test_archive_written_once(self):
+        Path(self.directory.name, 'Other.svg').write_bytes(self.template.encode('utf-8'))
+        with mock.patch.object(template_archive, 'write_archive', wraps=template_archive.write_archive) as write:
+            self.assertEqual(compact_templates(self.directory.name), ['Custom/Stick.svg', 'Other.svg'])
+        write.assert_called_once()
+        self.assertEqual(restore_templates(self.directory.name), ['Custom/Stick.svg', 'Other.svg'])
+        self.assertEqual(Path(self.directory.name, 'Other.svg').read_bytes(), self.template.encode('utf-8'))
+
+
+if __name__ == '__main__':
+    unittest.main()
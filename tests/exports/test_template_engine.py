@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import unittest
+from classes.template_engine import CompiledTemplate, TemplateCache, Placeholder, load_template_index, \
+    write_template_index
+
+
+class TestTemplateEngine(unittest.TestCase):
+    template = "<svg><t>TEMPLATE_NAME</t><t>BUTTON_1</t><t>button_2</t><t>Button_1_rect</t><t>BUTTON_30</t></svg>"
+
+    def test_placeholders_tokenized(self):
+        compiled = CompiledTemplate(self.template)
+        self.assertEqual([p.key for p in compiled.placeholders], ['TEMPLATE_NAME', 'BUTTON_1', 'BUTTON_2', 'BUTTON_30'])
+        self.assertEqual(len(compiled.chunks), len(compiled.placeholders) + 1)
+
+    def test_render_single_pass(self):
+        compiled = CompiledTemplate(self.template)
+        data = compiled.render({'BUTTON_1': 'Fire & Forget', 'BUTTON_2': 'NO BIND'}.items(), 'No Bind', title='A10')
+        self.assertEqual(data, "<svg><t>A10</t><t>Fire &amp; Forget</t><t>No Bind</t><t>Button_1_rect</t>"
+                               "<t>No Bind</t></svg>")
+
+    def test_render_keeps_unbound(self):
+        compiled = CompiledTemplate(self.template)
+        data = compiled.render({'button_30': 'Gear'}.items(), 'No Bind', fill_unbound=False)
+        self.assertEqual(data, "<svg><t>TEMPLATE_NAME</t><t>BUTTON_1</t><t>button_2</t><t>Button_1_rect</t>"
+                               "<t>Gear</t></svg>")
+
+    def test_render_is_repeatable(self):
+        compiled = CompiledTemplate(self.template)
+        first = compiled.render({'BUTTON_1': 'One'}.items(), 'No Bind')
+        compiled.render({'BUTTON_1': 'Two'}.items(), 'No Bind')
+        self.assertEqual(first, compiled.render({'BUTTON_1': 'One'}.items(), 'No Bind'))
+
+    def test_render_backslash_description(self):
+        compiled = CompiledTemplate("<t>BUTTON_1</t>")
+        self.assertEqual(compiled.render({'BUTTON_1': 'C:\\1'}.items(), 'No Bind'), "<t>C:\\1</t>")
+
+
+class TestTemplateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = TemplateCache(max_entries=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_template(self, name: str, content: str) -> str:
+        template_path = os.path.join(self.directory.name, name)
+        with open(template_path, "w", encoding="utf-8") as template_file:
+            template_file.write(content)
+        return template_path
+
+    def test_compiled_once(self):
+        template_path = self.write_template("a.svg", "<t>BUTTON_1</t>")
+        self.assertIs(self.cache.get(template_path), self.cache.get(template_path))
+
+    def test_changed_file_recompiled(self):
+        template_path = self.write_template("a.svg", "<t>BUTTON_1</t>")
+        first = self.cache.get(template_path)
+        self.write_template("a.svg", "<t>BUTTON_1</t><t>BUTTON_2</t>")
+        second = self.cache.get(template_path)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(second.placeholders), 2)
+
+    def test_least_recently_used_evicted(self):
+        a = self.cache.get(self.write_template("a.svg", "a"))
+        self.cache.get(self.write_template("b.svg", "b"))
+        self.assertIs(self.cache.get(os.path.join(self.directory.name, "a.svg")), a)
+        self.cache.get(self.write_template("c.svg", "c"))
+        self.assertEqual(len(self.cache), 2)
+        self.assertIs(self.cache.get(os.path.join(self.directory.name, "a.svg")), a)
+
+    def test_reserve(self):
+        self.cache.reserve(3)
+        paths = [self.write_template(f"{name}.svg", name) for name in "abc"]
+        compiled = [self.cache.get(template_path) for template_path in paths]
+        for template_path, first in zip(paths, compiled):
+            self.assertIs(self.cache.get(template_path), first)
+        self.cache.reserve(1)
+        self.assertEqual(self.cache.max_entries, 3)
+
+    def test_missing_template(self):
+        self.assertIsNone(self.cache.get(os.path.join(self.directory.name, "missing.svg")))
+
+    def test_index_used_while_hash_matches(self):
+        template_path = self.write_template("a.svg", '<t id="Button_1_div">BUTTON_1</t>\r\n<t>TEMPLATE_NAME</t>')
+        index = write_template_index(template_path)
+        self.assertEqual(index.elements, {'Button_1': {'div': 'Button_1_div'}})
+        self.assertEqual(index.placeholders, [Placeholder('BUTTON_1', 'BUTTON_1', 21, 29),
+                                              Placeholder('TEMPLATE_NAME', 'TEMPLATE_NAME', 37, 50)])
+        # Placeholders from the index, offsets that do not come from a scan show it was used
+        with open(template_path, 'rb') as template_file:
+            data = template_file.read()
+        stored = load_template_index(template_path, data)
+        self.assertEqual(stored, index)
+        stored.placeholders.pop()
+        with open(template_path[:-4] + '.index.json', 'w', encoding='utf-8') as index_file:
+            json.dump(stored.to_json(), index_file)
+        compiled = self.cache.get(template_path)
+        self.assertEqual(compiled.render((), 'NB', title='A10'), '<t id="Button_1_div">NB</t>\n<t>TEMPLATE_NAME</t>')
+
+    def test_index_element_paths(self):
+        template_path = self.write_template("a.svg", '<svg><!-- c --><g><t id="Button_1_div">BUTTON_1</t>'
+                                                     '<t id="Button_1_text">BUTTON_1</t></g></svg>')
+        index = write_template_index(template_path)
+        self.assertEqual(index.paths, {'Button_1_div': [1, 0], 'Button_1_text': [1, 1]})
+
+    def test_stale_index_ignored(self):
+        template_path = self.write_template("a.svg", "<t>BUTTON_1</t>")
+        write_template_index(template_path)
+        self.write_template("a.svg", "<t>BUTTON_1</t><t>BUTTON_2</t>")
+        with open(template_path, 'rb') as template_file:
+            self.assertIsNone(load_template_index(template_path, template_file.read()))
+        self.assertEqual(len(self.cache.get(template_path).placeholders), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+import adaptors.joystick_gremlin as gremlin
+
+
+class TestGremlinLoader(unittest.TestCase):
+    profile = '''<?xml version="1.0" ?>
+<profile version="9">
+    <devices>
+        <device name="Stick" type="joystick">
+            <mode name="Base">
+                <button description="Fire" id="1">
+                    <container type="basic">
+                        <action-set>
+                            <macro><button description="Nested" id="9"/></macro>
+                            <switch><mode name="Nested"/></switch>
+                        </action-set>
+                    </container>
+                </button>
+                <button description="" id="2"/>
+            </mode>
+            <mode inherit="Base" name="Landing">
+                <button description="Gear" id="2"/>
+            </mode>
+        </device>
+    </devices>
+</profile>
+'''
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'profile.xml')
+        with open(self.file_path, 'w', encoding='utf-8') as profile_file:
+            profile_file.write(self.profile)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_single_pass_load(self):
+        devices = gremlin.JoystickGremlin(self.file_path).get_devices()
+        self.assertEqual(devices, [
+            gremlin.GremlinDevice('Stick', [
+                gremlin.GremlinMode('Base', False, {'BUTTON_1': 'Fire', 'BUTTON_2': 'NO BIND'}),
+                gremlin.GremlinMode('Landing', 'Base', {'BUTTON_2': 'Gear'}),
+            ])
+        ])
+
+    def test_loaded_on_first_use(self):
+        instance = gremlin.JoystickGremlin(os.path.join(self.directory.name, 'missing.xml'))
+        with self.assertRaises(OSError):
+            instance.get_device_names()
+
+
+if __name__ == '__main__':
+    unittest.main()
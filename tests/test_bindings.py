@@ -0,0 +1,65 @@
+import unittest
+from classes.bindings import BindingModel, Mode, button_index
+
+
+class TestBindings(unittest.TestCase):
+
+    def test_button_index(self):
+        self.assertEqual(button_index('BUTTON_12'), 12)
+        self.assertEqual(button_index('BUTTON_012'), -1)
+        self.assertEqual(button_index('BUTTON_RZ'), -1)
+        self.assertEqual(button_index('POV1_U'), -1)
+        self.assertEqual(button_index('BUTTON_99999'), -1)
+
+    def test_mode_keeps_order_and_other_keys(self):
+        mode = Mode.from_buttons('A10', False, {'BUTTON_3': 'Gear', 'POV1_U': 'Trim', 'BUTTON_1': 'Flaps'})
+        self.assertEqual(list(mode.bound), [3, 1])
+        self.assertEqual(mode.get('BUTTON_3'), 'Gear')
+        self.assertEqual(mode.get('POV1_U'), 'Trim')
+        self.assertIsNone(mode.get('BUTTON_2'))
+        self.assertIsNone(mode.get('BUTTON_50'))
+        self.assertEqual(mode.own_buttons(), {'BUTTON_3': 'Gear', 'BUTTON_1': 'Flaps', 'POV1_U': 'Trim'})
+        self.assertEqual(len(mode), 3)
+
+    def test_dict_adapter(self):
+        model = BindingModel()
+        model.set_mode('Stick', 'A10', False, {'BUTTON_1': 'Flaps'})
+        model.set_mode('Stick', 'F18', False, {'BUTTON_2': 'Gear'})
+        model.set_mode('Throttle', 'A10', 'F18', {})
+        model.filter_modes(['A10'])
+        self.assertEqual(model.to_dict('NO BIND'), {
+            'Stick': {'A10': {'Buttons': {'BUTTON_1': 'Flaps'}, 'Axis': '', 'Inherit': False}},
+            'Throttle': {'A10': {'Buttons': {}, 'Axis': '', 'Inherit': 'F18'}},
+        })
+
+    def test_button_bound_to_none(self):
+        mode = Mode.from_buttons('A10', False, {})
+        mode.set('BUTTON_2', None)
+        mode.set('BUTTON_2', None)
+        mode.set('BUTTON_2', 'Gear')
+        self.assertEqual(list(mode.bound), [2])
+        self.assertEqual(mode.own_buttons(), {'BUTTON_2': 'Gear'})
+        self.assertEqual(len(mode), 1)
+
+    def test_dict_kept_in_sync(self):
+        model = BindingModel()
+        model.set_mode('Stick', 'A10', False, {'BUTTON_1': 'Flaps'})
+        dictionary = model.to_dict('NO BIND')
+        dictionary['Stick']['A10']['Buttons']['BUTTON_9'] = 'Added by caller'
+        model.set_mode('Stick', 'F18', 'A10', {'BUTTON_2': 'Gear'})
+        model.resolve_inheritance('NO BIND')
+        self.assertIs(model.to_dict('NO BIND'), dictionary)
+        self.assertEqual(dictionary['Stick']['A10']['Buttons'], {'BUTTON_1': 'Flaps', 'BUTTON_9': 'Added by caller'})
+        self.assertEqual(dictionary['Stick']['F18']['Buttons'], {'BUTTON_2': 'Gear', 'BUTTON_1': 'Flaps'})
+        model.filter_modes(['F18'])
+        self.assertEqual(list(dictionary['Stick']), ['F18'])
+
+    def test_from_dict(self):
+        dictionary = {'Stick': {'A10': {'Buttons': {'BUTTON_1': 'Flaps'}, 'Axis': '', 'Inherit': False}}}
+        model = BindingModel.from_dict(dictionary, 'NO BIND')
+        self.assertIs(model.to_dict('NO BIND'), dictionary)
+        self.assertEqual(model.devices['Stick'].modes['A10'].get('BUTTON_1'), 'Flaps')
+
+
+if __name__ == '__main__':
+    unittest.main()
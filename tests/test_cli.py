@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import cli
+import config
+
+
+class TestCli(unittest.TestCase):
+    profile = os.path.abspath(os.path.join('tests', 'data', 'joystick_gremlin', 'gremlin_no_inherit.xml'))
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # Export manifest and parse cache out of the repository's logs directory
+        self.state_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.state_directory.cleanup)
+
+    def test_export_jg_profiles(self):
+        result = cli.main(['export', '--source', 'jg', self.profile, '--profiles', 'A10', '--out', self.directory.name,
+                           '--format', 'svg', '--jobs', '1', '--state-dir', self.state_directory.name])
+        self.assertEqual(result, 0)
+        self.assertEqual(os.listdir(self.state_directory.name), ['export_manifest.json'])
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         ['JG_VPC Stick MT-50CM_A10.svg', 'JG_VPC Throttle MT-50 CM2_A10.svg'])
+
+    def test_missing_source(self):
+        self.assertEqual(cli.main(['export', '--source', 'jg', 'missing.xml', '--out', self.directory.name,
+                                   '--state-dir', self.state_directory.name]), 1)
+        self.assertEqual(cli.main(['export', '--source', 'other', self.profile]), 2)
+
+    def test_module_entry_point_without_qt(self):
+        # Run from the state directory so its logs (jv.log) stay out of the repository too
+        environment = dict(os.environ, PYTHONPATH=os.path.abspath('src'))
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'joystick_diagrams', 'export',
+                                    '--source', 'jg', self.profile, '--out', self.directory.name,
+                                    '--templates', os.path.abspath('templates')],
+                                   env=environment, capture_output=True, text=True, cwd=self.state_directory.name)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertNotIn('PyQt5', completed.stderr)
+        self.assertNotIn('pygame', completed.stderr)
+        self.assertEqual(len(os.listdir(self.directory.name)), 6)
+
+    def test_spawned_worker_import_without_qt(self):
+        # spawn and forkserver workers run the entry module again as __mp_main__
+        environment = dict(os.environ, PYTHONPATH=os.path.abspath('src'))
+        entry_point = os.path.abspath(os.path.join('src', 'joystick_diagrams.py'))
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                                    f"import runpy; runpy.run_path({entry_point!r}, run_name='__mp_main__')"],
+                                   env=environment, capture_output=True, text=True, cwd=self.state_directory.name)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertNotIn('PyQt5', completed.stderr)
+        self.assertNotIn('main_window', completed.stderr)
+
+    def test_parse_jobs_from_dcs_config(self):
+        arguments = ['export', '--source', 'jg', self.profile, '--out', self.directory.name, '--format', 'svg',
+                     '--state-dir', self.state_directory.name]
+        with mock.patch.object(config, 'dcs_jobs', 3), mock.patch.object(config, 'export_jobs', 1), \
+                mock.patch.object(cli, 'load_bindings', return_value={}) as load_bindings:
+            self.assertEqual(cli.main(arguments), 0)
+            self.assertEqual(load_bindings.call_args.args[3], 3)
+            self.assertEqual(cli.main(arguments + ['--jobs', '2']), 0)
+            self.assertEqual(load_bindings.call_args.args[3], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import adaptors.joystick_diagram_interface as jdi
+from classes.bindings import InheritedButtons, resolve_inheritance_order
+
+
+class Interface(jdi.JDInterface):
+
+    def get_device_names(self) -> list[str]:
+        return list(self.joystick_dictionary)
+
+    def get_modes(self) -> list[str]:
+        return []
+
+
+class TestInheritance(unittest.TestCase):
+
+    def setUp(self):
+        self.interface = Interface()
+
+    def test_order_parents_first(self):
+        order, cycles = resolve_inheritance_order({'C': 'B', 'B': 'A', 'A': False, 'D': 'A'})
+        self.assertEqual(order, ['A', 'B', 'C', 'D'])
+        self.assertEqual(cycles, [])
+
+    def test_order_reports_cycles(self):
+        order, cycles = resolve_inheritance_order({'A': 'B', 'B': 'C', 'C': 'A', 'D': 'C', 'E': 'Missing'})
+        self.assertEqual(cycles, [['A', 'B', 'C']])
+        self.assertEqual(order, ['D', 'E'])
+
+    def test_multi_level_chain(self):
+        self.interface.update_joystick_dictionary('Stick', 'C', 'B', {'BUTTON_3': 'C3', 'BUTTON_1': 'NO BIND'})
+        self.interface.update_joystick_dictionary('Stick', 'B', 'A', {'BUTTON_2': 'B2'})
+        self.interface.update_joystick_dictionary('Stick', 'A', False, {'BUTTON_1': 'A1', 'BUTTON_2': 'A2'})
+        self.interface.inherit_joystick_dictionary()
+        self.assertEqual(self.interface.joystick_dictionary['Stick']['C']['Buttons'],
+                         {'BUTTON_1': 'A1', 'BUTTON_2': 'B2', 'BUTTON_3': 'C3'})
+        self.assertEqual(self.interface.joystick_dictionary['Stick']['B']['Buttons'],
+                         {'BUTTON_1': 'A1', 'BUTTON_2': 'B2'})
+
+    def test_cycle_keeps_own_buttons(self):
+        self.interface.update_joystick_dictionary('Stick', 'A', 'B', {'BUTTON_1': 'A1'})
+        self.interface.update_joystick_dictionary('Stick', 'B', 'A', {'BUTTON_2': 'B2'})
+        self.interface.inherit_joystick_dictionary()
+        self.assertEqual(self.interface.joystick_dictionary['Stick']['A']['Buttons'], {'BUTTON_1': 'A1'})
+        self.assertEqual(self.interface.inheritance_cycles, {'Stick': [['A', 'B']]})
+
+    def test_layered_matches_merged(self):
+        merged = Interface()
+        self.interface.layered_inheritance = True
+        for interface in (merged, self.interface):
+            interface.update_joystick_dictionary('Stick', 'C', 'B', {'BUTTON_3': 'C3', 'BUTTON_1': 'NO BIND'})
+            interface.update_joystick_dictionary('Stick', 'B', 'A', {'BUTTON_2': 'B2', 'BUTTON_4': 'NO BIND'})
+            interface.update_joystick_dictionary('Stick', 'A', False, {'BUTTON_1': 'A1', 'BUTTON_2': 'A2'})
+            interface.inherit_joystick_dictionary()
+        for mode in ('A', 'B', 'C'):
+            expected = merged.joystick_dictionary['Stick'][mode]['Buttons']
+            layered = self.interface.joystick_dictionary['Stick'][mode]['Buttons']
+            self.assertEqual(list(layered.items()), list(expected.items()))
+        layered = self.interface.joystick_dictionary['Stick']['C']['Buttons']
+        self.assertIsInstance(layered, InheritedButtons)
+        self.assertEqual(layered.materialize(), {'BUTTON_3': 'C3', 'BUTTON_1': 'A1', 'BUTTON_2': 'B2',
+                                                 'BUTTON_4': 'NO BIND'})
+        self.assertEqual(len(layered), 4)
+        self.assertNotIn('BUTTON_5', layered)
+        with self.assertRaises(KeyError):
+            layered['BUTTON_5']
+
+    def test_layered_views_shared(self):
+        self.interface.layered_inheritance = True
+        self.interface.update_joystick_dictionary('Stick', 'A', False, {'BUTTON_1': 'A1'})
+        self.interface.update_joystick_dictionary('Stick', 'B', 'A', {'BUTTON_2': 'B2'})
+        self.interface.update_joystick_dictionary('Stick', 'C', 'B', {'BUTTON_3': 'C3'})
+        self.interface.update_joystick_dictionary('Stick', 'D', 'B', {'BUTTON_4': 'D4'})
+        self.interface.inherit_joystick_dictionary()
+        modes = self.interface.joystick_dictionary['Stick']
+        device = self.interface.bindings.devices['Stick']
+        self.assertIs(modes['C']['Buttons'].parent, modes['B']['Buttons'])
+        self.assertIs(modes['D']['Buttons'].parent, modes['B']['Buttons'])
+        self.assertIs(modes['B']['Buttons'].parent, device.modes['A'].buttons('NO BIND'))
+        mode = device.modes['C']
+        self.assertIs(mode.buttons('NO BIND'), modes['C']['Buttons'])
+        mode.set('BUTTON_5', 'C5')
+        self.assertIsNot(mode.buttons('NO BIND'), modes['C']['Buttons'])
+        self.assertEqual(mode.buttons('NO BIND')['BUTTON_5'], 'C5')
+
+
+if __name__ == '__main__':
+    unittest.main()
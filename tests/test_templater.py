@@ -31,5 +31,46 @@ class TestTemplater(unittest.TestCase):
         button_text = self.get_element_by_id('Button_13_div', tree)
         assert button_text.text == 'Turbo Boost'
 
+    def test_templater_index_matches_element_scan(self):
+        template_path = Path(os.path.join('templates', 'CH Fighterstick USB.svg'))
+        indexed = Templater(template_path)
+        scanned = Templater(template_path)
+        scanned._index = None
+        for templater in (indexed, scanned):
+            templater.replace_with_bindings({'Button_13': 'Turbo Boost'})
+        self.assertIsNotNone(indexed._index)
+        self.assertEqual(indexed.get_template_as_bytes(), scanned.get_template_as_bytes())
+
+    def test_get_elements(self):
+        template_path = Path(os.path.join('templates', 'CH Fighterstick USB.svg'))
+        indexed = Templater(template_path)
+        scanned = Templater(template_path)
+        scanned._index = None
+        indexed_rects = {name: element.get('id') for name, element in indexed.get_elements('rect').items()}
+        scanned_rects = {name: element.get('id') for name, element in scanned.get_elements('rect').items()}
+        self.assertEqual(indexed_rects, scanned_rects)
+        self.assertEqual(indexed_rects['Button_13'], 'Button_13_rect')
+
+    def test_index_resolves_elements_without_scan(self):
+        templater = Templater(Path(os.path.join('templates', 'CH Fighterstick USB.svg')))
+        self.assertTrue(templater._index.paths)
+
+        def scan_ids():
+            raise AssertionError('indexed template scanned')
+        templater.scan_ids = scan_ids
+        templater.replace_with_bindings({'Button_13': 'Turbo Boost'})
+        self.assertEqual(templater.get_elements('text')['Button_13'].text, 'Turbo Boost')
+
+    def test_stale_index_paths_fall_back_to_scan(self):
+        template_path = Path(os.path.join('templates', 'CH Fighterstick USB.svg'))
+        templater = Templater(template_path)
+        templater._index = templater._index._replace(
+            paths={element_id: [0] for element_id in templater._index.paths})
+        templater.replace_with_bindings({'Button_13': 'Turbo Boost'})
+        scanned = Templater(template_path)
+        scanned._index = None
+        scanned.replace_with_bindings({'Button_13': 'Turbo Boost'})
+        self.assertEqual(templater.get_template_as_bytes(), scanned.get_template_as_bytes())
+
     def get_element_by_id(self, element_id: str, tree: ElementTree):
         return tree.xpath(f"//*[@id='{element_id}']")[0]
@@ -0,0 +1,179 @@
+import os
+import unittest
+from io import BytesIO
+from pathlib import Path
+
+import pygame
+from lxml import etree
+
+from classes.templater import Templater
+from classes.visualizer import DeviceManager, DeviceModel, DeviceState, DeviceTemplate, device_layout, merge_changes
+
+
+class TestDeviceTemplate(unittest.TestCase):
+
+    def setUp(self):
+        templater = Templater(Path(os.path.join('templates', 'CH Fighterstick USB.svg')))
+        templater.replace_with_bindings({})
+        self.template = DeviceTemplate(templater.get_tree(), templater.get_elements('rect'))
+
+    def get_fill(self, button_name: str) -> str:
+        tree = etree.parse(BytesIO(self.template.to_bytes()))
+        return tree.xpath(f"//*[@id='{button_name}_rect']")[0].get('fill')
+
+    def test_highlight_pressed_and_restore_released(self):
+        assert self.template.highlight({'Button_13', 'Button_2'})
+        assert self.get_fill('Button_13') == 'red'
+        assert self.get_fill('Button_2') == 'red'
+        assert self.template.highlight({'Button_2'})
+        assert self.get_fill('Button_13') == '#ffffff'
+        assert self.get_fill('Button_2') == 'red'
+
+    def test_highlight_unchanged(self):
+        assert not self.template.highlight(set())
+        assert self.template.highlight({'Button_13'})
+        assert not self.template.highlight({'Button_13'})
+
+    def test_unmapped_buttons_ignored(self):
+        assert not self.template.highlight({'Button_99'})
+        assert self.template.highlight({'Button_99', 'Button_13'})
+        assert self.get_fill('Button_13') == 'red'
+
+    def test_drawio_content_dropped(self):
+        assert 'content' not in self.template.tree.getroot().attrib
+
+
+class FakeJoystick:
+    """ The parts of pygame.joystick.Joystick DeviceManager uses """
+
+    def __init__(self, instance_id: int):
+        self.instance_id = instance_id
+        self.closed = False
+
+    def init(self):
+        pass
+
+    def quit(self):
+        self.closed = True
+
+    def get_instance_id(self):
+        return self.instance_id
+
+    def get_name(self):
+        return 'CH Fighterstick USB'
+
+    def get_guid(self):
+        return '0300'
+
+    def get_numbuttons(self):
+        return 3
+
+    def get_numaxes(self):
+        return 2
+
+    def get_numhats(self):
+        return 1
+
+    def get_button(self, index):
+        return 1 if index == 0 else 0
+
+    def get_axis(self, index):
+        return 0.0
+
+    def get_hat(self, index):
+        return 0, 0
+
+
+class TestDeviceManager(unittest.TestCase):
+
+    def setUp(self):
+        self.device_state = {}
+        self.manager = DeviceManager(self.device_state)
+        self.joystick = FakeJoystick(4)
+        assert self.manager.open_device(self.joystick) == 'Joystick 4'
+
+    def test_open_device_reads_state_once(self):
+        state = self.device_state['Joystick 4']
+        assert state.deviceName == 'CH Fighterstick USB'
+        assert dict(state.button_items()) == {'Button_1': True, 'Button_2': False, 'Button_3': False}
+        assert dict(state.axis_items()) == {'Axis_1': 0.0, 'Axis_2': 0.0}
+        assert dict(state.hat_items()) == {'Hat_1': (0, 0)}
+        assert self.manager.open_device(self.joystick) is None
+
+    def test_events_update_changed_inputs(self):
+        changed = self.manager.handle_events([
+            pygame.event.Event(pygame.JOYBUTTONDOWN, instance_id=4, button=1),
+            pygame.event.Event(pygame.JOYBUTTONUP, instance_id=4, button=0),
+            pygame.event.Event(pygame.JOYAXISMOTION, instance_id=4, axis=1, value=0.5),
+            pygame.event.Event(pygame.JOYHATMOTION, instance_id=4, hat=0, value=(1, 0)),
+        ])
+        assert changed == {'Joystick 4': {'Button_1', 'Button_2', 'Axis_2', 'Hat_1'}}
+        state = self.device_state['Joystick 4']
+        assert state.pressed_buttons() == {'Button_2'}
+        assert state.get_input('Axis_2') == 0.5
+        assert state.get_input('Hat_1') == (1, 0)
+
+    def test_events_without_change(self):
+        assert self.manager.handle_events([
+            pygame.event.Event(pygame.JOYBUTTONDOWN, instance_id=4, button=0),
+            pygame.event.Event(pygame.JOYAXISMOTION, instance_id=4, axis=0, value=0.0),
+            pygame.event.Event(pygame.JOYBUTTONDOWN, instance_id=7, button=0),
+        ]) == {}
+
+    def test_device_removed(self):
+        assert self.manager.handle_events([
+            pygame.event.Event(pygame.JOYBUTTONDOWN, instance_id=4, button=1),
+            pygame.event.Event(pygame.JOYDEVICEREMOVED, instance_id=4),
+        ]) == {'Joystick 4': None}
+        assert self.device_state == {}
+        assert self.joystick.closed
+
+
+class TestDeviceState(unittest.TestCase):
+
+    def test_layout_shared(self):
+        assert device_layout(32, 6, 1) is device_layout(32, 6, 1)
+        first = DeviceState('Joystick 1', 'CH Fighterstick USB', layout=device_layout(32, 6, 1))
+        second = DeviceState('Joystick 2', 'CH Fighterstick USB', layout=device_layout(32, 6, 1))
+        assert first.layout.buttons is second.layout.buttons
+        assert len(first.buttons) == 32 and len(first.axes) == 6 and len(first.hats) == 2
+
+    def test_set_reports_changes(self):
+        state = DeviceState('Joystick 1', 'CH Fighterstick USB', layout=device_layout(2, 1, 1))
+        assert state.set_button(1, True)
+        assert not state.set_button(1, True)
+        assert state.set_axis(0, 0.1)
+        assert not state.set_axis(0, 0.1)
+        assert state.set_hat(0, (-1, 1))
+        assert not state.set_hat(0, (-1, 1))
+        assert state.get_input('Button_2') is True
+        assert state.get_input('Hat_1') == (-1, 1)
+        assert state.get_input('Button_3') is None
+
+
+class TestDeviceChanges(unittest.TestCase):
+
+    def test_merge_changes(self):
+        changes = {'Joystick 1': {'Button_1'}, 'Joystick 2': None}
+        merge_changes(changes, {'Joystick 1': {'Axis_1'}, 'Joystick 2': {'Button_2'}, 'Joystick 3': {'Hat_1'}})
+        assert changes == {'Joystick 1': {'Button_1', 'Axis_1'}, 'Joystick 2': None, 'Joystick 3': {'Hat_1'}}
+        merge_changes(changes, {'Joystick 1': None})
+        assert changes['Joystick 1'] is None
+
+    def test_device_model_updates_changed_inputs(self):
+        device_state = {}
+        manager = DeviceManager(device_state)
+        manager.open_device(FakeJoystick(4))
+        model = DeviceModel()
+        updated = []
+        model.dataChanged.connect(lambda top_left, bottom_right: updated.append(model.data(top_left, 0)))
+        assert model.signal_state(device_state['Joystick 4'])
+        manager.handle_events([pygame.event.Event(pygame.JOYBUTTONDOWN, instance_id=4, button=2)])
+        assert not model.signal_state(device_state['Joystick 4'], {'Button_3'})
+        assert updated == [True]
+        model.remove_device('Joystick 4')
+        assert model.rowCount() == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,11 @@
 from PyQt5 import QtCore
-import joystick_diagrams
+import classes.export as export
+import main_window
 import version
 
 
 def test_title(qtbot):
-    window = joystick_diagrams.MainWindow()
+    window = main_window.MainWindow()
     qtbot.addWidget(window)
     title = "Joystick Diagrams - V"
     version_text = version.VERSION
@@ -12,14 +13,14 @@ def test_title(qtbot):
 
 
 def test_default_ui(qtbot):
-    window = joystick_diagrams.MainWindow()
+    window = main_window.MainWindow()
     window.show()
     qtbot.addWidget(window)
     assert not window.export_button.isEnabled()
 
 
 def test_dcs_file_load_success(qtbot):
-    window = joystick_diagrams.MainWindow()
+    window = main_window.MainWindow()
     window.show()
     qtbot.addWidget(window)
     window.dcs_directory = './tests/data/dcs_world/valid_dcs_world_directory'
@@ -33,7 +34,7 @@ def test_dcs_file_load_success(qtbot):
 
 
 def test_dcs_file_load_failure_config(qtbot):
-    window = joystick_diagrams.MainWindow()
+    window = main_window.MainWindow()
     window.show()
     qtbot.addWidget(window)
     window.dcs_directory = './tests/data/dcs_world/invalid_dcs_world_no_config'
@@ -44,7 +45,7 @@ def test_dcs_file_load_failure_config(qtbot):
 
 
 def test_dcs_file_load_failure_input(qtbot):
-    window = joystick_diagrams.MainWindow()
+    window = main_window.MainWindow()
     window.show()
     qtbot.addWidget(window)
     window.dcs_directory = './tests/data/dcs_world/invalid_dcs_world_no_input'
@@ -56,10 +57,36 @@ def test_dcs_file_load_failure_input(qtbot):
 
 
 def test_jg_file_load(qtbot):
-    window = joystick_diagrams.MainWindow()
+    window = main_window.MainWindow()
     window.show()
     qtbot.addWidget(window)
     assert window.jg_profile_list.count() == 0
     window.jg_file = './tests/data/joystick_gremlin/gremlin_inherit_no_inherit.xml'
     window.load_jg_file()
     assert window.jg_profile_list.count() == 4
+
+
+def test_export_worker(qtbot, tmp_path):
+    data = {'VPC Stick MT-50CM': {'A10': {'Buttons': {'BUTTON_3': 'Trim Up'}, 'Axis': '', 'Inherit': False}}}
+    exporter = export.Export(data, 'JG')
+    exporter.export_directory = str(tmp_path) + '/'
+    worker = main_window.ExportWorker(exporter)
+    progress = []
+    worker.signals.progress.connect(progress.append)
+    with qtbot.waitSignal(worker.signals.finished) as finished:
+        QtCore.QThreadPool.globalInstance().start(worker)
+    assert finished.args == [[]]
+    assert progress[-1] == 100
+    assert [path.name for path in tmp_path.iterdir()] == ['JG_VPC Stick MT-50CM_A10.svg']
+
+
+def test_export_worker_cancelled(qtbot, tmp_path):
+    data = {'VPC Stick MT-50CM': {'A10': {'Buttons': {}, 'Axis': '', 'Inherit': False}}}
+    exporter = export.Export(data, 'JG')
+    exporter.export_directory = str(tmp_path) + '/'
+    exporter.cancel()
+    worker = main_window.ExportWorker(exporter)
+    with qtbot.waitSignal(worker.signals.finished) as finished:
+        QtCore.QThreadPool.globalInstance().start(worker)
+    assert finished.args == [['Export cancelled']]
+    assert list(tmp_path.iterdir()) == []